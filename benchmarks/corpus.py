@@ -0,0 +1,140 @@
+"""Deterministic synthetic PDF corpus for benchmarks.
+
+Each generator writes a document of a given kind and page count; the same
+arguments always produce the same content, so timings are comparable
+between runs and branches.
+"""
+
+import random
+from pathlib import Path
+from typing import Callable, Dict
+
+import fitz  # PyMuPDF
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792  # US Letter
+MARGIN = 72
+BODY_SIZE = 10
+WORDS = (
+    "the of and to in is that for on with as by this from at are be or an "
+    "document section result value method table figure analysis report data "
+    "process system model test case example equation note reference page"
+).split()
+
+def _sentence(rng: random.Random, words: int = 12) -> str:
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+def _paragraph(rng: random.Random, sentences: int = 5) -> str:
+    return ' '.join(_sentence(rng, rng.randint(8, 16)) for _ in range(sentences))
+
+def _write_lines(page: fitz.Page, lines, top: float = MARGIN) -> None:
+    """Write (text, size) paragraphs top-down until the page is full."""
+    y = top
+    for text, size in lines:
+        box = fitz.Rect(MARGIN, y, PAGE_WIDTH - MARGIN, PAGE_HEIGHT - MARGIN)
+        unused = page.insert_textbox(box, text, fontsize=size, fontname="helv")
+        if unused < 0:  # Did not fit, nothing was written
+            break
+        y = box.y1 - unused + size * 0.6
+
+def text_page(page: fitz.Page, rng: random.Random, page_num: int) -> None:
+    """Prose with numbered headings in larger fonts."""
+    lines = [(f"{page_num + 1}. {_sentence(rng, 3)[:-1]}", 18)]
+    for section in range(3):
+        lines.append((f"{page_num + 1}.{section + 1} {_sentence(rng, 3)[:-1]}", 14))
+        lines.extend((_paragraph(rng), BODY_SIZE) for _ in range(2))
+    _write_lines(page, lines)
+
+def table_page(page: fitz.Page, rng: random.Random, page_num: int) -> None:
+    """Dense grid of numbers, one span per cell, like indexes and data tables."""
+    columns, rows = 8, 60
+    cell_width = (PAGE_WIDTH - 2 * MARGIN) / columns
+    cell_height = (PAGE_HEIGHT - 2 * MARGIN) / rows
+    writer = fitz.TextWriter(page.rect)
+    for row in range(rows):
+        for column in range(columns):
+            value = f"{rng.uniform(0, 10000):.2f}"
+            point = (MARGIN + column * cell_width, MARGIN + (row + 1) * cell_height)
+            writer.append(point, value, fontsize=7)
+    writer.write_text(page)
+
+def image_page(page: fitz.Page, rng: random.Random, page_num: int) -> None:
+    """A short caption and a grid of raster images."""
+    _write_lines(page, [(_sentence(rng), BODY_SIZE)])
+    columns, rows = 3, 4
+    tile_width = (PAGE_WIDTH - 2 * MARGIN) / columns
+    tile_height = (PAGE_HEIGHT - 3 * MARGIN) / rows
+    for row in range(rows):
+        for column in range(columns):
+            pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 64, 48), False)
+            pixmap.set_rect(pixmap.irect, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+            pixmap.set_rect(fitz.IRect(8, 8, 40, 30), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+            x0 = MARGIN + column * tile_width
+            y0 = 2 * MARGIN + row * tile_height
+            page.insert_image(fitz.Rect(x0 + 4, y0 + 4, x0 + tile_width - 4, y0 + tile_height - 4), pixmap=pixmap)
+
+def brochure_page(page: fitz.Page, rng: random.Random, page_num: int) -> None:
+    """Bulleted prose with decorative image fragments: bullets, rules, spacers and a sliced picture."""
+    bullet = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 8, 8), True)  # Soft-masked, so it is rendered
+    bullet.set_rect(bullet.irect, (rng.randrange(256), rng.randrange(256), rng.randrange(256), 160))
+    spacer = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 1, 1), False)
+    spacer.set_rect(spacer.irect, (255, 255, 255))
+    y = MARGIN
+    for _ in range(24):
+        page.insert_image(fitz.Rect(MARGIN, y + 2, MARGIN + 6, y + 8), pixmap=bullet)
+        page.insert_text((MARGIN + 12, y + 8), _sentence(rng, 8), fontsize=BODY_SIZE, fontname="helv")
+        page.insert_image(fitz.Rect(MARGIN, y + 11, PAGE_WIDTH - MARGIN, y + 12), pixmap=spacer)
+        y += 14
+    # A picture stored as horizontal strips, as some layout tools export them
+    for row in range(40):
+        strip = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 200, 2), False)
+        strip.set_rect(strip.irect, (rng.randrange(256), 120, 255 - row * 6))
+        page.insert_image(fitz.Rect(MARGIN, y + row * 4, MARGIN + 400, y + row * 4 + 4), pixmap=strip)
+
+def latex_page(page: fitz.Page, rng: random.Random, page_num: int) -> None:
+    """Prose interleaved with inline and display LaTeX."""
+    lines = []
+    for index in range(6):
+        a, b = rng.randint(1, 9), rng.randint(1, 9)
+        lines.append((f"{_sentence(rng)} Here $x_{index} = {a} y^{b}$ holds and $\\alpha + \\beta = {a + b}$.", BODY_SIZE))
+        lines.append((f"\\begin{{equation}} \\int_0^{a} f(t) dt = \\frac{{{b}}}{{{a}}} \\end{{equation}}", BODY_SIZE))
+    _write_lines(page, lines)
+
+def footnote_page(page: fitz.Page, rng: random.Random, page_num: int) -> None:
+    """Prose with many footnote references and definitions at the bottom of the page."""
+    count = 8
+    first = page_num * count + 1
+    lines = [
+        (f"{_sentence(rng)} See note[{first + index}] and {_sentence(rng, 6)}", BODY_SIZE)
+        for index in range(count)
+    ]
+    _write_lines(page, lines)
+    notes = [(f"{first + index}. {_sentence(rng, 8)}", 7) for index in range(count)]
+    _write_lines(page, notes, top=PAGE_HEIGHT - MARGIN - count * 14)
+
+KINDS: Dict[str, Callable[[fitz.Page, random.Random, int], None]] = {
+    'text': text_page,
+    'tables': table_page,
+    'images': image_page,
+    'latex': latex_page,
+    'footnotes': footnote_page,
+    'brochure': brochure_page,
+}
+
+def generate(kind: str, pages: int, path: str, seed: int = 0) -> str:
+    """Write a synthetic PDF of ``kind`` with ``pages`` pages to ``path``."""
+    make_page = KINDS[kind]
+    rng = random.Random(f"{kind}-{seed}")
+    with fitz.open() as doc:
+        for page_num in range(pages):
+            make_page(doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT), rng, page_num)
+        doc.save(path, garbage=3, deflate=True)
+    return path
+
+def corpus_path(directory: str, kind: str, pages: int, seed: int = 0) -> str:
+    """Get the path of a corpus document, generating it on first use."""
+    path = Path(directory) / f"{kind}-{pages}p-s{seed}.pdf"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        generate(kind, pages, str(path), seed)
+    return str(path)
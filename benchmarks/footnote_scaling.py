@@ -0,0 +1,57 @@
+"""Check that footnote conversion scales linearly with document size.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.footnote_scaling --references 1000 4000 16000
+
+Each document has one paragraph per reference and a block of definitions
+at the end. The time per reference should stay roughly flat as the
+document grows; a superlinear implementation shows it climbing.
+"""
+
+import argparse
+import random
+import time
+from typing import List
+
+from src.processor.footnote_processor import FootnoteProcessor
+
+from .corpus import _sentence
+
+def footnote_text(references: int, seed: int = 0) -> str:
+    """Build a document with ``references`` footnote references and their definitions."""
+    rng = random.Random(seed)
+    body = [f"{_sentence(rng)} See note[{index + 1}]. {_sentence(rng, 8)}" for index in range(references)]
+    notes = [f"{index + 1}. {_sentence(rng, 8)}" for index in range(references)]
+    return '\n\n'.join(body) + '\n\n' + '\n'.join(notes)
+
+def time_conversion(text: str, repeat: int = 3) -> float:
+    """Best of ``repeat`` runs of ``FootnoteProcessor.convert_to_markdown``, in seconds."""
+    processor = FootnoteProcessor()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        processor.convert_to_markdown(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark footnote conversion scaling")
+    parser.add_argument("--references", nargs="+", type=int, default=[1000, 4000, 16000],
+                        help="Reference counts to benchmark (default: 1000 4000 16000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size, best is reported (default: 3)")
+    args = parser.parse_args(argv)
+
+    print(f"{'references':>10} {'chars':>10} {'seconds':>9} {'us/ref':>8} {'growth':>7}")
+    previous = None
+    for references in sorted(args.references):
+        text = footnote_text(references)
+        seconds = time_conversion(text, args.repeat)
+        per_reference = seconds / references * 1e6
+        # Ratio of time per reference to the previous size; ~1.0 means linear
+        growth = f"{per_reference / previous:7.2f}" if previous else f"{'-':>7}"
+        print(f"{references:>10} {len(text):>10} {seconds:9.3f} {per_reference:8.2f} {growth}")
+        previous = per_reference
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Benchmark the conversion pipeline on the synthetic corpus.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.run --kinds text images --pages 1 10 100
+    python -m benchmarks.run --pages 5000 --no-memory --json results.json
+
+Each document is converted end to end with ``convert_pdf_to_markdown``
+and an ``Instrumentation`` hook, reporting pages per second, the time
+spent in each stage and, unless ``--no-memory`` is given, peak memory:
+the peak resident set size of a fresh process converting the document,
+which includes MuPDF's and Pillow's buffers, and the peak of Python
+allocations alone, measured in a traced run.
+"""
+
+import sys
+import argparse
+import json
+import time
+import tracemalloc
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from src.converter import convert_pdf_to_markdown
+from src.instrumentation import Instrumentation
+from src.processor.image_processor import ImageProcessor
+
+from .corpus import KINDS, corpus_path
+
+def _converted_peak_rss(pdf_path: str) -> float:
+    """Worker process entry point: convert a document and return the process's peak RSS in MB."""
+    convert_pdf_to_markdown(pdf_path, image_processor=ImageProcessor())
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024  # Bytes on macOS, KiB elsewhere
+
+def peak_rss_mb(pdf_path: str) -> Optional[float]:
+    """Peak resident set size of a fresh process converting ``pdf_path``, or None without ``resource``.
+    
+    ``RUSAGE_CHILDREN`` keeps the largest child seen so far, so each
+    document gets its own process, which reports its own peak.
+    """
+    if resource is None:
+        return None
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(_converted_peak_rss, pdf_path).result()
+
+def benchmark(pdf_path: str, pages: int, measure_memory: bool = True) -> Dict[str, Any]:
+    """Convert one document and collect timings and peak memory."""
+    instrumentation = Instrumentation()
+    start = time.perf_counter()
+    convert_pdf_to_markdown(pdf_path, image_processor=ImageProcessor(), instrumentation=instrumentation)
+    seconds = time.perf_counter() - start
+
+    result = {
+        'seconds': seconds,
+        'pages_per_second': pages / seconds if seconds else float('inf'),
+        'stages': {name: stats.wall_time for name, stats in instrumentation.stages.items()},
+        'peak_rss_mb': None,
+        'peak_python_mb': None
+    }
+
+    if measure_memory:
+        result['peak_rss_mb'] = peak_rss_mb(pdf_path)
+        # Tracing slows allocation down, so Python allocations are measured in a separate run
+        tracemalloc.start()
+        try:
+            convert_pdf_to_markdown(pdf_path, image_processor=ImageProcessor())
+            result['peak_python_mb'] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        finally:
+            tracemalloc.stop()
+
+    return result
+
+def format_row(kind: str, pages: int, result: Dict[str, Any]) -> str:
+    memory = ' '.join(
+        f"{result[key]:8.1f}" if result[key] is not None else f"{'-':>8}"
+        for key in ('peak_rss_mb', 'peak_python_mb')
+    )
+    stages = ', '.join(
+        f"{name} {seconds:.3f}s"
+        for name, seconds in sorted(result['stages'].items(), key=lambda item: -item[1])[:4]
+    )
+    return f"{kind:<10} {pages:>6} {result['seconds']:9.3f} {result['pages_per_second']:9.1f} {memory}  {stages}"
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark PDF to Markdown conversion")
+    parser.add_argument("--kinds", nargs="+", choices=sorted(KINDS), default=sorted(KINDS),
+                        help="Corpus document kinds to benchmark (default: all)")
+    parser.add_argument("--pages", nargs="+", type=int, default=[1, 10, 100],
+                        help="Page counts to benchmark (default: 1 10 100)")
+    parser.add_argument("--corpus-dir", default="benchmarks/corpus",
+                        help="Directory for generated corpus documents (default: benchmarks/corpus)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory measurement")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    print(f"{'kind':<10} {'pages':>6} {'seconds':>9} {'pages/s':>9} {'RSS MB':>8} {'py MB':>8}  slowest stages")
+    results = []
+    for kind in args.kinds:
+        for pages in args.pages:
+            pdf_path = corpus_path(args.corpus_dir, kind, pages)
+            result = benchmark(pdf_path, pages, measure_memory=not args.no_memory)
+            results.append({'kind': kind, 'pages': pages, **result})
+            print(format_row(kind, pages, result))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as json_file:
+            json.dump(results, json_file, indent=2)
+
+if __name__ == "__main__":
+    main()
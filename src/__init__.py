@@ -1,6 +1,8 @@
 """PDF to Markdown converter package."""
 
 from .converter import convert_pdf_to_markdown
+from .cache import ConversionCache, PageCache
+from .instrumentation import Instrumentation
 from .processor.image_processor import ImageProcessor
 from .processor.latex_processor import LatexProcessor
 from .processor.footnote_processor import FootnoteProcessor
@@ -10,6 +12,9 @@ __version__ = "1.0.0"
 
 __all__ = [
     "convert_pdf_to_markdown",
+    "ConversionCache",
+    "PageCache",
+    "Instrumentation",
     "ImageProcessor",
     "LatexProcessor",
     "FootnoteProcessor",
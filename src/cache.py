@@ -0,0 +1,182 @@
+import os
+import json
+import base64
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Tuple, List, Dict, Optional, Any
+
+from .processor.page_layout import SpanRuns
+from .processor.assets import AssetSink
+from .processor.image_processor import IMAGE_EXTENSIONS
+from .source import DocumentSource, PDFInput
+
+class ConversionCache:
+    """Content-addressed on-disk cache of conversion results.
+
+    Entries are keyed by a hash of the PDF bytes plus the processor
+    configuration and hold the final markdown, images and TOC in one JSON
+    file. Images written to an asset sink are stored with the entry and
+    written back through the sink on a hit, so the links stay valid even
+    if the files were removed; results are not cached for sinks that
+    cannot read their assets back. Hits refresh the entry's modification time; when the cache grows
+    past ``max_size`` bytes the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = 1024 ** 3):
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._size = None  # Running total of entry sizes, computed on first write
+
+    def key(self, pdf_path: PDFInput, config: Dict[str, Any]) -> str:
+        """Build the cache key for a PDF and processor configuration."""
+        source = pdf_path if isinstance(pdf_path, DocumentSource) else DocumentSource(pdf_path)
+        digest = hashlib.sha256()
+        for chunk in source.read_chunks():
+            digest.update(chunk)
+        digest.update(json.dumps(config, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as entry_file:
+                entry = json.load(entry_file)
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def _write(self, key: str, entry: Dict[str, Any]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as entry_file:
+                json.dump(entry, entry_file)
+            os.replace(tmp_path, self._entry_path(key))
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+        # Only rescan the directory when the running total exceeds the limit
+        if self._size is None:
+            self.evict()
+        else:
+            self._size += self._entry_path(key).stat().st_size
+            if self._size > self.max_size:
+                self.evict()
+
+    def _pack_assets(self, images: List[Dict], asset_sink: Optional[AssetSink]) -> Optional[Dict[str, List[str]]]:
+        """Read back the asset files ``images`` link to, or None if the sink cannot."""
+        assets = {}
+        for img in images:
+            name = img.get('asset')
+            if name is None or name in assets:
+                continue
+            if asset_sink is None:
+                return None
+            try:
+                data = asset_sink.read(name)
+            except NotImplementedError:
+                return None
+            except OSError as e:
+                print(f"Warning: Failed to read asset {name} for the cache: {str(e)}")
+                return None
+            mime_type = next(mime for mime, ext in IMAGE_EXTENSIONS.items() if name.endswith(f".{ext}"))
+            assets[name] = [mime_type, base64.b64encode(data).decode('ascii')]
+        return assets
+
+    def _assets_entry(self, assets: Dict[str, List[str]]) -> Dict[str, Any]:
+        """Entry fields holding ``assets``; none when there are none."""
+        return {'assets': assets} if assets else {}
+
+    def _restore_assets(self, entry: Dict[str, Any], asset_sink: Optional[AssetSink]) -> bool:
+        """Write the assets stored with an entry back through the sink; False if that failed.
+        
+        Without a sink, e.g. for text-only conversion, the assets are not needed.
+        """
+        if asset_sink is None:
+            return True
+        for name, (mime_type, data) in entry.get('assets', {}).items():
+            try:
+                asset_sink.write(name, base64.b64decode(data), mime_type)
+            except Exception as e:
+                print(f"Warning: Failed to restore cached asset {name}: {str(e)}")
+                return False
+        return True
+
+    def get(self, key: str, asset_sink: Optional[AssetSink] = None) -> Optional[Tuple[str, List[Dict], str]]:
+        """Get the cached (markdown, images, toc) for a key, if present, restoring its assets."""
+        entry = self._read(key)
+        if entry is None or not self._restore_assets(entry, asset_sink):
+            return None
+        return entry['markdown'], entry['images'], entry['toc']
+
+    def put(self, key: str, markdown: str, images: List[Dict], toc: str,
+            asset_sink: Optional[AssetSink] = None) -> None:
+        """Store a conversion result and evict old entries if over the size limit."""
+        assets = self._pack_assets(images, asset_sink)
+        if assets is not None:
+            self._write(key, {'markdown': markdown, 'images': images, 'toc': toc, **self._assets_entry(assets)})
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits in ``max_size``."""
+        entries = []
+        total_size = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.json'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError as e:
+                print(f"Warning: Failed to evict cache entry: {str(e)}")
+        self._size = total_size
+
+
+class PageCache(ConversionCache):
+    """On-disk cache of per-page extraction results.
+
+    Entries are keyed by a page fingerprint (see
+    ``PDFConverter.fingerprint_page``) plus the processor configuration, so
+    re-converting an edited document only re-extracts the pages that changed.
+    """
+
+    def page_key(self, fingerprint: str, config: Dict[str, Any]) -> str:
+        """Build the cache key for a page fingerprint and processor configuration."""
+        digest = hashlib.sha256(fingerprint.encode('utf-8'))
+        digest.update(json.dumps(config, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get_page(self, key: str, asset_sink: Optional[AssetSink] = None) -> Optional[Tuple[str, List[Dict], SpanRuns, List[Dict]]]:
+        """Get the cached (text, images, font runs, blocks) of a page, if present, restoring its assets."""
+        entry = self._read(key)
+        if entry is None or not self._restore_assets(entry, asset_sink):
+            return None
+        font_info = SpanRuns()
+        for offset, size, bold in entry['font_runs']:
+            font_info.append(offset, size, bold)
+        return entry['text'], entry['images'], font_info, entry['blocks']
+
+    def put_page(self, key: str, text: str, images: List[Dict], font_info: SpanRuns, blocks: List[Dict],
+                 asset_sink: Optional[AssetSink] = None) -> None:
+        """Store the extraction result of a page."""
+        assets = self._pack_assets(images, asset_sink)
+        if assets is None:
+            return
+        self._write(key, {
+            'text': text,
+            'images': images,
+            'font_runs': list(font_info),
+            'blocks': blocks,
+            **self._assets_entry(assets)
+        })
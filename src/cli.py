@@ -8,7 +8,17 @@ from .processor.image_processor import ImageProcessor
 from .processor.latex_processor import LatexProcessor
 from .processor.footnote_processor import FootnoteProcessor
 from .processor.heading_processor import HeadingProcessor
-from .converter import convert_pdf_to_markdown
+from .processor.assets import DirectorySink
+from .converter import PDFConverter, convert_pdf_to_markdown
+from .cache import ConversionCache, PageCache
+from .instrumentation import Instrumentation
+
+def image_quality(value: str) -> int:
+    """Parse an --image-quality value, rejecting anything outside 1-100."""
+    quality = int(value)
+    if not 1 <= quality <= 100:
+        raise argparse.ArgumentTypeError(f"must be between 1 and 100, got {quality}")
+    return quality
 
 def setup_argparser() -> argparse.ArgumentParser:
     """Set up command line argument parser."""
@@ -30,11 +40,18 @@ def setup_argparser() -> argparse.ArgumentParser:
     
     parser.add_argument(
         "--image-quality",
-        help="Image quality (1-100, default: 75)",
-        type=int,
+        help="JPEG/WebP quality of photographs (1-100, default: 75)",
+        type=image_quality,
         default=75
     )
     
+    parser.add_argument(
+        "--photo-format",
+        help="Format of photographs; line art and icons are always PNG (default: jpeg)",
+        choices=["jpeg", "webp"],
+        default="jpeg"
+    )
+    
     parser.add_argument(
         "--max-image-size",
         help="Maximum image dimension in pixels (default: 800)",
@@ -42,6 +59,12 @@ def setup_argparser() -> argparse.ArgumentParser:
         default=800
     )
     
+    parser.add_argument(
+        "--image-assets",
+        help="Write images as files into <name>_assets/ next to the markdown instead of embedding them",
+        action="store_true"
+    )
+    
     parser.add_argument(
         "--disable-latex",
         help="Disable LaTeX equation processing",
@@ -60,6 +83,44 @@ def setup_argparser() -> argparse.ArgumentParser:
         action="store_true"
     )
     
+    parser.add_argument(
+        "--workers",
+        help="Number of worker processes for page extraction (default: 1)",
+        type=int,
+        default=1
+    )
+    
+    parser.add_argument(
+        "--image-threads",
+        help="Number of threads encoding images while pages are extracted (default: 0, encode inline)",
+        type=int,
+        default=0
+    )
+    
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory for caching conversion results (default: no cache)",
+        type=str
+    )
+    
+    parser.add_argument(
+        "--page-cache-dir",
+        help="Directory for caching per-page results so only edited pages are re-extracted",
+        type=str
+    )
+    
+    parser.add_argument(
+        "--low-memory",
+        help="Convert page by page and stream the output to disk to bound memory use",
+        action="store_true"
+    )
+    
+    parser.add_argument(
+        "--profile",
+        help="Write per-stage timings and counters as JSON next to each output file",
+        action="store_true"
+    )
+    
     parser.add_argument(
         "--web",
         help="Start web interface",
@@ -79,27 +140,54 @@ def process_file(input_path: Path, output_dir: Path, args: argparse.Namespace) -
     """Process a single PDF file."""
     try:
         # Initialize processors based on arguments
-        image_processor = ImageProcessor()
-        image_processor.max_dimension = args.max_image_size
+        image_processor = ImageProcessor(
+            asset_sink=DirectorySink(output_dir / f"{input_path.stem}_assets") if args.image_assets else None,
+            max_dimension=args.max_image_size,
+            encode_threads=args.image_threads,
+            image_quality=args.image_quality,
+            photo_format=args.photo_format
+        )
         
         latex_processor = None if args.disable_latex else LatexProcessor()
         footnote_processor = None if args.disable_footnotes else FootnoteProcessor()
         heading_processor = None if args.disable_toc else HeadingProcessor()
         
-        # Convert PDF to markdown
-        markdown, images, toc = convert_pdf_to_markdown(
-            str(input_path),
-            image_processor=image_processor,
-            latex_processor=latex_processor,
-            footnote_processor=footnote_processor,
-            heading_processor=heading_processor
-        )
-        
         # Create output filename
         output_file = output_dir / f"{input_path.stem}.md"
+        instrumentation = Instrumentation() if args.profile else None
         
-        # Save markdown
-        output_file.write_text(markdown, encoding='utf-8')
+        if args.low_memory:
+            # Stream pages straight to the output file
+            converter = PDFConverter(
+                image_processor=image_processor,
+                latex_processor=latex_processor,
+                footnote_processor=footnote_processor,
+                heading_processor=heading_processor,
+                instrumentation=instrumentation
+            )
+            with open(output_file, 'w', encoding='utf-8') as output:
+                converter.convert_to_file(str(input_path), output)
+        else:
+            # Convert PDF to markdown
+            markdown, images, toc = convert_pdf_to_markdown(
+                str(input_path),
+                image_processor=image_processor,
+                latex_processor=latex_processor,
+                footnote_processor=footnote_processor,
+                heading_processor=heading_processor,
+                workers=args.workers,
+                cache=ConversionCache(args.cache_dir) if args.cache_dir else None,
+                page_cache=PageCache(args.page_cache_dir) if args.page_cache_dir else None,
+                instrumentation=instrumentation
+            )
+            
+            # Save markdown
+            output_file.write_text(markdown, encoding='utf-8')
+            
+        # Save timings
+        if instrumentation is not None:
+            profile_file = output_dir / f"{input_path.stem}.profile.json"
+            profile_file.write_text(instrumentation.to_json(), encoding='utf-8')
         
         return str(output_file)
         
@@ -130,6 +218,14 @@ def main():
     if not args.input:
         parser.error("Input path is required when not using --web")
         
+    # Streaming conversion extracts pages one at a time without caches
+    if args.low_memory:
+        unsupported = [flag for flag, used in (("--workers", args.workers != 1),
+                                               ("--cache-dir", args.cache_dir),
+                                               ("--page-cache-dir", args.page_cache_dir)) if used]
+        if unsupported:
+            parser.error(f"--low-memory cannot be combined with {', '.join(unsupported)}")
+        
     # Process input path
     input_path = Path(args.input)
     if not input_path.exists():
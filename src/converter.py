@@ -1,115 +1,191 @@
 import fitz  # PyMuPDF
-from typing import Tuple, List, Dict, Optional
-from pathlib import Path
-import os
+from typing import Tuple, List, Dict, Optional, Iterator, Any, TextIO
+import hashlib
+import shutil
 import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
 from .processor.image_processor import ImageProcessor
+from .processor.assets import AssetSink
 from .processor.latex_processor import LatexProcessor
-from .processor.footnote_processor import FootnoteProcessor
+from .processor.footnote_processor import FootnoteProcessor, FootnoteAccumulator
 from .processor.heading_processor import HeadingProcessor
 from .processor.markdown_assembler import MarkdownAssembler
+from .processor.page_layout import PageLayout, SpanRuns, BlockIndex, FontStatistics, remove_ranges, replace_ranges
+from .cache import ConversionCache, PageCache
+from .instrumentation import Instrumentation, stage
+from .source import DocumentSource, PDFInput
+
+# Part of the cache configuration; bump when the same settings produce different output
+OUTPUT_VERSION = 11
+
+BOLD_FLAG = 16  # Bold bit of a span's font flags
 
 class PDFConverter:
     def __init__(self, 
                  image_processor: Optional[ImageProcessor] = None,
                  latex_processor: Optional[LatexProcessor] = None,
                  footnote_processor: Optional[FootnoteProcessor] = None,
-                 heading_processor: Optional[HeadingProcessor] = None):
-        """Initialize the PDF converter with optional processors."""
+                 heading_processor: Optional[HeadingProcessor] = None,
+                 workers: int = 1,
+                 page_cache: Optional[PageCache] = None,
+                 instrumentation: Optional[Instrumentation] = None):
+        """Initialize the PDF converter with optional processors.
+
+        With ``workers`` > 1, page extraction is sharded across that many
+        worker processes; the output is identical to the serial path. With a
+        ``page_cache``, per-page extraction results are stored by page
+        fingerprint and only changed pages are re-extracted. An
+        ``instrumentation`` hook records per-stage and per-page timings.
+        """
         self.image_processor = image_processor
         self.latex_processor = latex_processor or LatexProcessor()
         self.footnote_processor = footnote_processor or FootnoteProcessor()
         self.heading_processor = heading_processor or HeadingProcessor()
         self.markdown_assembler = MarkdownAssembler()
+        self.workers = max(1, workers)
+        self.page_cache = page_cache
+        self.instrumentation = instrumentation
+        if image_processor is not None and instrumentation is not None:
+            image_processor.instrumentation = instrumentation
+        
+    def config(self) -> Dict[str, Any]:
+        """Describe the processor configuration that determines the conversion output."""
+        return {
+            'version': OUTPUT_VERSION,
+            'image_processor': {
+                'dpi': self.image_processor.dpi,
+                'max_dimension': self.image_processor.max_dimension,
+                'quality_settings': self.image_processor.quality_settings,
+                'asset_sink': repr(self.image_processor.asset_sink) if self.image_processor.asset_sink else None
+            } if self.image_processor else None,
+            'latex_processor': type(self.latex_processor).__name__,
+            'footnote_processor': type(self.footnote_processor).__name__,
+            'heading_processor': type(self.heading_processor).__name__
+        }
+        
+    def fingerprint_page(self, page: fitz.Page, xref_digests: Optional[Dict[int, bytes]] = None) -> str:
+        """Hash everything that determines a page's extraction result.
+        
+        Covers the page's content stream, its resource dictionary, the
+        objects and streams of the images, fonts and form XObjects it uses,
+        and its geometry. ``xref_digests`` memoizes object hashes shared
+        between pages of the same document.
+        """
+        doc = page.parent
+        if xref_digests is None:
+            xref_digests = {}
+            
+        digest = hashlib.sha256(page.read_contents())
+        resources_type, resources = doc.xref_get_key(page.xref, "Resources")
+        if resources_type == 'xref':
+            resources = doc.xref_object(int(resources.split()[0]))
+        digest.update(resources.encode('utf-8'))
+        digest.update(repr((tuple(page.rect), page.rotation)).encode('utf-8'))
         
-    def extract_page_content(self, page: fitz.Page, temp_dir: str) -> Tuple[str, List[Dict], Dict, List[Dict]]:
-        """Extract text, images, and font info from a page."""
+        xrefs = {item[0] for item in page.get_images(full=True)}
+        xrefs.update(item[0] for item in page.get_fonts(full=True))
+        xrefs.update(item[0] for item in page.get_xobjects())
+        for xref in sorted(xrefs):
+            if xref <= 0:
+                continue
+            if xref not in xref_digests:
+                object_digest = hashlib.sha256(doc.xref_object(xref).encode('utf-8'))
+                if doc.xref_is_stream(xref):
+                    object_digest.update(doc.xref_stream_raw(xref))
+                xref_digests[xref] = object_digest.digest()
+            digest.update(xref_digests[xref])
+            
+        return digest.hexdigest()
+        
+    def extract_page_content(self, page: fitz.Page, temp_dir: Optional[str] = None,
+                             wait: bool = False) -> Tuple[str, List[Dict], SpanRuns, List[Dict]]:
+        """Extract text, images, and font runs from a page.
+        
+        Images are placed but not yet rendered or encoded (see
+        ``ImageProcessor.extract_images``), so text-only callers skip their
+        cost; pass ``wait=True`` or the images to
+        ``image_processor.wait_images`` to produce them. Images are
+        processed in memory; ``temp_dir`` is accepted for compatibility and
+        unused.
+        """
         text_blocks = []
         structured_blocks = []
         images = []
-        font_info = {}
+        font_info = SpanRuns()
+        text_length = 0  # Length of '\n'.join(text_blocks), tracked incrementally
         
-        # Get page dimensions for relative positioning
-        page_width = page.rect.width
-        page_height = page.rect.height
+        # Parse the page layout once; it is shared with the image processor
+        with stage(self.instrumentation, 'get_text', page.number):
+            layout = PageLayout.from_page(page)
         
         # First pass: Extract text and build structured blocks
-        blocks = page.get_text("dict")["blocks"]
-        for block in blocks:
-            if block["type"] == 0:  # Text block
-                block_text = []
-                for line in block["lines"]:
-                    for span in line["spans"]:
-                        text = span["text"]
-                        if text.strip():
-                            position = len('\n'.join(text_blocks))
-                            font_info[position] = (span["size"], span["flags"] & 2 != 0)  # size and bold flag
-                            block_text.append(text)
-                
-                if block_text:
-                    full_text = ' '.join(block_text)
-                    text_blocks.append(full_text)
-                    # Store structured block info
-                    structured_blocks.append({
-                        'text': full_text,
-                        'x': block["bbox"][0] / page_width,  # Normalize coordinates
-                        'y': block["bbox"][1] / page_height,
-                        'width': (block["bbox"][2] - block["bbox"][0]) / page_width,
-                        'height': (block["bbox"][3] - block["bbox"][1]) / page_height,
-                        'position': len('\n'.join(text_blocks))  # Store position for image placement
-                    })
+        for block in layout.text_blocks:
+            block_text = []
+            block_start = text_length + 1 if text_blocks else 0
+            position = block_start
+            for line in block["lines"]:
+                for span in line["spans"]:
+                    text = span["text"]
+                    if text.strip():
+                        font_info.append(position, span["size"], span["flags"] & BOLD_FLAG != 0)
+                        block_text.append(text)
+                        position += len(text) + 1  # +1 for the joining space
+            
+            if block_text:
+                full_text = ' '.join(block_text)
+                text_blocks.append(full_text)
+                text_length = block_start + len(full_text)
+                # Store structured block info
+                structured_blocks.append({
+                    'text': full_text,
+                    **layout.normalize_bbox(block["bbox"]),  # Normalize coordinates
+                    'position': text_length  # Store position for image placement
+                })
         
         # Extract images using the image processor
         if self.image_processor:
-            images = self.image_processor.extract_images(page, temp_dir)
+            with stage(self.instrumentation, 'extract_images', page.number):
+                images = self.image_processor.extract_images(page, layout=layout)
+            if wait:
+                self._wait_images(images, page.number)
             
-            # Find nearest text position for each image
+            # Anchor each image to the nearest text block in its column
+            block_index = BlockIndex(structured_blocks)
             for img in images:
-                img_y = img['y']
-                min_distance = float('inf')
-                position = 0
-                
-                for block in structured_blocks:
-                    block_y = block.get('y', 0)
-                    distance = abs(img_y - block_y)
-                    if distance < min_distance:
-                        min_distance = distance
-                        position = block.get('position', 0)
-                
-                img['position'] = position
+                block = block_index.nearest(img['y'], img['x'], img['x'] + img['width'])
+                img['position'] = block['position'] if block else 0
                 
         return '\n'.join(text_blocks), images, font_info, structured_blocks
         
-    def convert(self, pdf_path: str) -> Tuple[str, List[Dict], str, List[Dict]]:
-        """Convert PDF to markdown with images and table of contents."""
-        self.doc = fitz.open(pdf_path)
+    def convert(self, pdf_path: PDFInput, images: bool = True) -> Tuple[str, List[Dict], str, List[Dict]]:
+        """Convert PDF to markdown with images and table of contents.
+        
+        ``pdf_path`` may also be PDF bytes, a memoryview or a binary
+        file-like object (see ``DocumentSource``). With ``images=False``
+        images are never rendered or encoded and are left out of the
+        markdown, for text-only consumers such as search indexing.
+        """
+        source = DocumentSource(pdf_path)
+        self.doc = source.open()
         all_text = []
         all_images = []
-        all_font_info = {}
+        all_font_info = SpanRuns()
+        font_stats = FontStatistics()
         all_blocks = []
         current_position = 0
         
-        # Create temporary directory for image processing
-        temp_dir = tempfile.mkdtemp(prefix='pdf2md_')
-        
         try:
-            # Process each page
-            for page_num in range(len(self.doc)):
-                page = self.doc[page_num]
-                text, images, font_info, blocks = self.extract_page_content(page, temp_dir)
-                
+            for page_num, (text, page_images, font_info, blocks) in enumerate(self._extract_pages(source, images)):
                 # Update positions for font info
-                offset_font_info = {
-                    k + current_position: v for k, v in font_info.items()
-                }
-                all_font_info.update(offset_font_info)
+                all_font_info.extend(font_info, current_position)
+                font_stats.add(font_info, len(text))
                 
                 # Update positions for images and blocks
-                for img in images:
+                for img in page_images:
                     img['position'] += current_position
                     img['y'] += page_num  # Adjust y-coordinate for page number
-                all_images.extend(images)
+                all_images.extend(page_images)
                 
                 # Update blocks with page offset
                 for block in blocks:
@@ -117,50 +193,323 @@ class PDFConverter:
                 all_blocks.extend(blocks)
                 
                 all_text.append(text)
-                current_position += len(text) + 1  # +1 for newline
+                current_position += len(text) + 2  # +2 for the blank line between pages
                 
             # Combine all text
             combined_text = '\n\n'.join(all_text)
             
             # Process with specialized processors
             # Handle LaTeX equations
-            if self.latex_processor.detect_latex(combined_text):
-                combined_text = self.latex_processor.convert_to_markdown(combined_text)
+            with stage(self.instrumentation, 'latex') as timer:
+                if self.latex_processor.detect_latex(combined_text):
+                    # Keep the font runs on the rewritten text for heading detection
+                    combined_text, mapping = replace_ranges(combined_text, self.latex_processor.replacements(combined_text))
+                    all_font_info = all_font_info.remap(mapping)
+                timer.add_bytes(len(combined_text))
                 
             # Process headings and generate TOC
-            processed_text = self.heading_processor.convert_to_markdown(combined_text, all_font_info)
-            headings = self.heading_processor.extract_headings(combined_text, all_font_info)
-            toc = self.heading_processor.get_table_of_contents(headings)
+            with stage(self.instrumentation, 'headings') as timer:
+                processed_text, headings, toc = self.heading_processor.analyze(combined_text, all_font_info, font_stats)
+                timer.add_bytes(len(processed_text) + len(toc))
             
             # Handle footnotes
-            processed_text = self.footnote_processor.convert_to_markdown(processed_text)
-            
-            # Assemble final markdown with text blocks
-            final_markdown = self.markdown_assembler.assemble(
-                processed_text,
-                all_images,
-                toc=toc,
-                text_blocks=all_blocks
-            )
+            with stage(self.instrumentation, 'footnotes') as timer:
+                processed_text = self.footnote_processor.convert_to_markdown(processed_text)
+                timer.add_bytes(len(processed_text))
+            
+            # Assemble final markdown
+            with stage(self.instrumentation, 'assemble') as timer:
+                final_markdown = self.markdown_assembler.assemble(
+                    processed_text,
+                    all_images,
+                    toc=toc
+                )
+                timer.add_bytes(len(final_markdown))
             
             return final_markdown, all_images, toc, all_blocks
             
         finally:
-            self.doc.close()
-            # Clean up temporary files
-            if self.image_processor:
-                self.image_processor.cleanup(temp_dir)
+            self._close_images()
+            source.close()
+                
+    def convert_iter(self, pdf_path: PDFInput, images: bool = True) -> Iterator[str]:
+        """Convert PDF to markdown page by page, yielding each finished chunk.
+        
+        Only the cross-page state needed by the document-level stages is kept:
+        the heading levels seen so far and the open footnotes. Footnote
+        definitions are found by block position and emitted as a final
+        chunk; pages referencing footnotes defined further on are held back
+        for a few pages (see ``FootnoteAccumulator``). Pages are assembled
+        one page late so their images can finish encoding while the next
+        page is extracted. The headings found are available as
+        ``self.headings`` once the generator is exhausted so a table of
+        contents can be built with ``heading_processor.get_table_of_contents``.
+        Chunks are separate markdown fragments and should be joined with
+        blank lines. ``images=False`` leaves images out as in ``convert``.
+        """
+        source = DocumentSource(pdf_path)
+        self.doc = source.open()
+        self.headings = []
+        heading_levels = set()
+        font_stats = FontStatistics()  # Grows page by page
+        footnotes = FootnoteAccumulator(self.footnote_processor)
+        held = []  # Pages released by the previous page, assembled one page late
+        
+        try:
+            for page_num in range(len(self.doc)):
+                text, page_images, font_info, blocks = self.extract_page_content(self.doc[page_num])
+                if images:
+                    self._start_images(page_images)
+                else:
+                    page_images = []  # Placed but never rendered
+                
+                # Cut footnote definition blocks out of the page before any offsets change
+                with stage(self.instrumentation, 'footnotes', page_num):
+                    ranges = footnotes.take_definitions(text, blocks)
+                    if ranges:
+                        text, mapping = remove_ranges(text, ranges)
+                        font_info = font_info.remap(mapping)
+                        for img in page_images:
+                            img['position'] = mapping(img['position'])
+                
+                # Handle LaTeX equations
+                with stage(self.instrumentation, 'latex', page_num) as timer:
+                    if self.latex_processor.detect_latex(text):
+                        text, mapping = replace_ranges(text, self.latex_processor.replacements(text))
+                        font_info = font_info.remap(mapping)
+                    timer.add_bytes(len(text))
+                    
+                # Process headings, ranking levels against those seen on earlier pages
+                with stage(self.instrumentation, 'headings', page_num) as timer:
+                    font_stats.add(font_info, len(text))
+                    headings = self.heading_processor.extract_headings(text, font_info, normalize=False,
+                                                                       font_stats=font_stats)
+                    heading_levels.update(heading.level for heading in headings)
+                    headings = self.heading_processor.normalize_heading_levels(headings, heading_levels)
+                    text = self.heading_processor.apply_headings(text, headings)
+                    self.headings.extend(headings)
+                    timer.add_bytes(len(text))
+                
+                # Rewrite footnote references once their definitions are known
+                with stage(self.instrumentation, 'footnotes', page_num) as timer:
+                    ready = footnotes.add_page(text, (page_num, page_images))
+                    timer.add_bytes(sum(len(page_text) for page_text, _ in ready))
+                
+                # Images of the held pages were encoding while this page was extracted
+                yield from self._assemble_pages(held)
+                held = ready
+                
+            yield from self._assemble_pages(held + footnotes.finish())
+            footnote_section = footnotes.footnote_section()
+            if footnote_section:
+                yield footnote_section
+                
+        finally:
+            self._close_images()
+            source.close()
+                
+    def _assemble_pages(self, pages: List[Tuple[str, Tuple[int, List[Dict]]]]) -> Iterator[str]:
+        """Assemble pages released as (text, (page number, images)), skipping empty chunks."""
+        for text, (page_num, images) in pages:
+            self._wait_images(images, page_num)
+            with stage(self.instrumentation, 'assemble', page_num) as timer:
+                chunk = self.markdown_assembler.assemble(text, images)
+                timer.add_bytes(len(chunk))
+            if chunk.strip():
+                yield chunk
+                
+    def convert_to_file(self, pdf_path: PDFInput, output: TextIO, images: bool = True) -> str:
+        """Convert PDF to markdown written to ``output``, keeping memory bounded per page.
+        
+        Pages are converted with ``convert_iter`` and spilled to a temporary
+        file as they are produced, so page text and images are never
+        collected for the whole document. The table of contents needs every
+        heading, so it is written first and the spilled body is then copied
+        after it. Returns the table of contents. ``images=False`` leaves
+        images out as in ``convert``.
+        """
+        with tempfile.TemporaryFile('w+', encoding='utf-8', prefix='pdf2md_') as body:
+            for chunk_num, chunk in enumerate(self.convert_iter(pdf_path, images)):
+                if chunk_num:
+                    body.write('\n\n')
+                body.write(chunk)
+                
+            toc = self.heading_processor.get_table_of_contents(self.headings)
+            if toc:
+                output.write(toc)
+                output.write('\n\n\n---\n\n\n')  # Separator after TOC, as in MarkdownAssembler
+                
+            body.seek(0)
+            shutil.copyfileobj(body, output)
+            
+        return toc
+        
+    def _extract_pages(self, source: DocumentSource,
+                       images: bool = True) -> Iterator[Tuple[str, List[Dict], SpanRuns, List[Dict]]]:
+        """Yield the extracted content of every page in order.
+        
+        Pages found in the page cache are loaded from it; the rest are
+        extracted, in worker processes if requested, and added to the cache.
+        Images are produced before their page is yielded, so no page object
+        outlives the next page; each page is yielded once the following one
+        is extracted so its images can encode in the meantime. With
+        ``images=False`` pages are yielded without images, none are
+        produced and nothing is added to the cache.
+        """
+        page_count = len(self.doc)
+        results = [None] * page_count
+        keys = [None] * page_count
+        if self.page_cache:
+            config = self.config()
+            xref_digests = {}
+            for page_num in range(page_count):
+                fingerprint = self.fingerprint_page(self.doc[page_num], xref_digests)
+                keys[page_num] = self.page_cache.page_key(fingerprint, config)
+                results[page_num] = self.page_cache.get_page(keys[page_num], self._asset_sink() if images else None)
+                
+        missing = [page_num for page_num in range(page_count) if results[page_num] is None]
+        if self.workers > 1 and len(missing) > 1:
+            extracted = iter(self._extract_pages_parallel(source, missing, images))
+        else:
+            extracted = (
+                self.extract_page_content(self.doc[page_num])
+                for page_num in missing
+            )
+            
+        held = None  # The previous page, as (page number, result, whether it was extracted here)
+        for page_num in range(page_count):
+            result, results[page_num] = results[page_num], None
+            extracted_here = result is None
+            if extracted_here:
+                result = next(extracted)
+            if not images:
+                result = (result[0], [], result[2], result[3])  # Placed but never rendered
+                extracted_here = False
+            elif extracted_here:
+                self._start_images(result[1])
+            if held is not None:
+                yield self._finish_page(*held, keys)
+            held = (page_num, result, extracted_here)
             
-def convert_pdf_to_markdown(pdf_path: str,
+        if held is not None:
+            yield self._finish_page(*held, keys)
+            
+    def _finish_page(self, page_num: int, result: Tuple[str, List[Dict], SpanRuns, List[Dict]],
+                     extracted_here: bool, keys: List[Optional[str]]) -> Tuple[str, List[Dict], SpanRuns, List[Dict]]:
+        """Produce the images of a page extracted by ``_extract_pages`` and add it to the page cache."""
+        if extracted_here:
+            self._wait_images(result[1], page_num)
+            if self.page_cache:
+                self.page_cache.put_page(keys[page_num], *result, asset_sink=self._asset_sink())
+        return result
+            
+    def _start_images(self, images: List[Dict]) -> None:
+        """Start encoding a page's images in the background if the image processor has threads for it."""
+        if self.image_processor and self.image_processor.encode_threads:
+            self.image_processor.start_images(images)
+            
+    def _wait_images(self, images: List[Dict], page_num: Optional[int] = None) -> None:
+        """Produce pending images before they are used; the document must still be open.
+        
+        Timed as its own 'wait_images' stage: rendering and encoding images
+        that are not finished yet, or waiting for the encoding threads. Its
+        bytes are those of the image references produced.
+        """
+        if self.image_processor:
+            with stage(self.instrumentation, 'wait_images', page_num) as timer:
+                self.image_processor.wait_images(images)
+                if self.instrumentation is not None:
+                    timer.add_bytes(sum(len(img.get('data') or img.get('src', '')) for img in images))
+            
+    def _asset_sink(self) -> Optional[AssetSink]:
+        """The asset sink images are written to, if any; caches store and restore its files."""
+        return self.image_processor.asset_sink if self.image_processor else None
+        
+    def _close_images(self) -> None:
+        """Stop the image processor's encoding threads once the document is done."""
+        if self.image_processor:
+            self.image_processor.close()
+            
+    def _extract_pages_parallel(self, source: DocumentSource, page_numbers: List[int],
+                                images: bool = True) -> List[Tuple[str, List[Dict], SpanRuns, List[Dict]]]:
+        """Extract page content in worker processes, returned in page order; without ``images`` none are extracted."""
+        workers = min(self.workers, len(page_numbers))
+        shard_size = -(-len(page_numbers) // workers)  # Ceiling division
+        shards = [
+            page_numbers[start:start + shard_size]
+            for start in range(0, len(page_numbers), shard_size)
+        ]
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_extract_page_range, source, shard, self.image_processor if images else None,
+                                self.instrumentation is not None)
+                for shard in shards
+            ]
+            results = []
+            for future in futures:
+                shard_results, instrumentation = future.result()
+                results.extend(shard_results)
+                if instrumentation is not None:
+                    self.instrumentation.merge(instrumentation)
+            return results
+
+def _extract_page_range(source: DocumentSource, page_numbers: List[int],
+                        image_processor: Optional[ImageProcessor],
+                        instrumented: bool = False) -> Tuple[List[Tuple[str, List[Dict], SpanRuns, List[Dict]]], Optional[Instrumentation]]:
+    """Worker process entry point: extract a set of pages from its own document.
+    
+    Returns the page results and, if ``instrumented``, the worker's measurements.
+    """
+    instrumentation = Instrumentation() if instrumented else None
+    converter = PDFConverter(image_processor=image_processor, instrumentation=instrumentation)
+    try:
+        doc = source.open()
+        results = [
+            converter.extract_page_content(doc[page_num], wait=True)
+            for page_num in page_numbers
+        ]
+        return results, instrumentation
+    finally:
+        if image_processor:
+            image_processor.close()
+        source.close()
+            
+def convert_pdf_to_markdown(pdf_path: PDFInput,
                           image_processor: Optional[ImageProcessor] = None,
                           latex_processor: Optional[LatexProcessor] = None,
                           footnote_processor: Optional[FootnoteProcessor] = None,
-                          heading_processor: Optional[HeadingProcessor] = None) -> Tuple[str, List[Dict], str, List[Dict]]:
-    """Convenience function to convert a PDF file to markdown."""
+                          heading_processor: Optional[HeadingProcessor] = None,
+                          workers: int = 1,
+                          cache: Optional[ConversionCache] = None,
+                          page_cache: Optional[PageCache] = None,
+                          instrumentation: Optional[Instrumentation] = None) -> Tuple[str, List[Dict], str]:
+    """Convenience function to convert a PDF file to markdown, images and TOC.
+    
+    ``pdf_path`` may be a path, PDF bytes, a memoryview or a binary file-like
+    object; in-memory input is opened without a temporary file.
+    With a ``cache``, results are looked up by PDF content and processor
+    configuration before the document is opened, and stored after conversion.
+    Pass an ``instrumentation`` hook to collect per-stage timings.
+    """
     converter = PDFConverter(
         image_processor=image_processor,
         latex_processor=latex_processor,
         footnote_processor=footnote_processor,
-        heading_processor=heading_processor
+        heading_processor=heading_processor,
+        workers=workers,
+        page_cache=page_cache,
+        instrumentation=instrumentation
     )
-    return converter.convert(pdf_path)
+    source = DocumentSource(pdf_path)
+    if cache is not None:
+        key = cache.key(source, converter.config())
+        cached = cache.get(key, converter._asset_sink())
+        if cached is not None:
+            return cached
+            
+    markdown, images, toc, _ = converter.convert(source)
+    
+    if cache is not None:
+        cache.put(key, markdown, images, toc, converter._asset_sink())
+    return markdown, images, toc
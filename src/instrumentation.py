@@ -0,0 +1,118 @@
+import json
+import time
+import threading
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional, Any
+
+@dataclass
+class StageStats:
+    """Accumulated measurements for one pipeline stage."""
+    calls: int = 0
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    bytes: int = 0
+
+    def add(self, other: "StageStats") -> None:
+        self.calls += other.calls
+        self.wall_time += other.wall_time
+        self.cpu_time += other.cpu_time
+        self.bytes += other.bytes
+
+class Instrumentation:
+    """Records wall time, CPU time, call counts and bytes produced per stage.
+
+    Attach an instance to ``PDFConverter`` (or pass it to
+    ``convert_pdf_to_markdown``) and read ``stages`` and ``pages`` after the
+    conversion, or export them with ``to_json``. CPU time is process-wide,
+    so it includes any worker threads running during a stage.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, StageStats] = {}
+        self.pages: Dict[int, Dict[str, StageStats]] = {}
+        self._lock = threading.Lock()  # Stages may be timed in image encoding threads
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Returned from worker processes: locks are not picklable
+        return {'stages': self.stages, 'pages': self.pages}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def stage(self, name: str, page: Optional[int] = None) -> "StageTimer":
+        """Time a stage, optionally attributed to a page: ``with hook.stage('render', 3) as timer``."""
+        return StageTimer(self, name, page)
+
+    def record(self, name: str, page: Optional[int], stats: StageStats) -> None:
+        """Add the measurements of one stage call."""
+        with self._lock:
+            self.stages.setdefault(name, StageStats()).add(stats)
+            if page is not None:
+                self.pages.setdefault(page, {}).setdefault(name, StageStats()).add(stats)
+
+    def merge(self, other: "Instrumentation") -> None:
+        """Add all measurements recorded by another instance, e.g. in a worker process."""
+        for name, stats in other.stages.items():
+            self.stages.setdefault(name, StageStats()).add(stats)
+        for page, stages in other.pages.items():
+            for name, stats in stages.items():
+                self.pages.setdefault(page, {}).setdefault(name, StageStats()).add(stats)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'stages': {name: asdict(stats) for name, stats in self.stages.items()},
+            'pages': {
+                page: {name: asdict(stats) for name, stats in stages.items()}
+                for page, stages in sorted(self.pages.items())
+            }
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+class StageTimer:
+    """Context manager measuring a single stage call."""
+
+    def __init__(self, instrumentation: Instrumentation, name: str, page: Optional[int]):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.page = page
+        self.bytes = 0
+
+    def add_bytes(self, count: int) -> None:
+        """Count bytes (or characters) produced by the stage."""
+        self.bytes += count
+
+    def __enter__(self) -> "StageTimer":
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.instrumentation.record(self.name, self.page, StageStats(
+            calls=1,
+            wall_time=time.perf_counter() - self._wall_start,
+            cpu_time=time.process_time() - self._cpu_start,
+            bytes=self.bytes
+        ))
+
+class _NullTimer:
+    """Shared no-op timer used when no instrumentation is attached."""
+
+    def add_bytes(self, count: int) -> None:
+        pass
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+_NULL_TIMER = _NullTimer()
+
+def stage(instrumentation: Optional[Instrumentation], name: str, page: Optional[int] = None):
+    """Time a stage with ``instrumentation``, or do nothing if it is None."""
+    if instrumentation is None:
+        return _NULL_TIMER
+    return instrumentation.stage(name, page)
@@ -1,15 +1,25 @@
 """PDF to Markdown processor modules."""
 
-from .image_processor import ImageProcessor
+from .image_processor import ImageProcessor, ImageHandle
 from .latex_processor import LatexProcessor
-from .footnote_processor import FootnoteProcessor
+from .footnote_processor import FootnoteProcessor, FootnoteAccumulator
 from .heading_processor import HeadingProcessor
 from .markdown_assembler import MarkdownAssembler
+from .assets import AssetSink, DirectorySink
+from .page_layout import PageLayout, SpanRuns, BlockIndex, FontStatistics
 
 __all__ = [
     "ImageProcessor",
+    "ImageHandle",
     "LatexProcessor",
     "FootnoteProcessor",
+    "FootnoteAccumulator",
     "HeadingProcessor",
-    "MarkdownAssembler"
+    "MarkdownAssembler",
+    "PageLayout",
+    "SpanRuns",
+    "BlockIndex",
+    "FontStatistics",
+    "AssetSink",
+    "DirectorySink"
 ]
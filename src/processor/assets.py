@@ -0,0 +1,54 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+class AssetSink:
+    """Destination for image files written outside the markdown.
+
+    ``write`` stores the encoded image under ``name`` and returns the
+    reference to use in the markdown, e.g. a relative path or a URL.
+    Subclass it to upload images elsewhere. With image encoding threads
+    (``ImageProcessor(encode_threads=...)``) ``write`` is called from
+    several threads at once, and with worker processes from several
+    processes. Names are derived from the image bytes, so writes under the
+    same name carry the same data.
+
+    ``read`` returns the bytes stored under ``name``. Conversion and page
+    caches use it to keep assets with their entries and write them back
+    on a hit; results are not cached for sinks that cannot read back.
+    """
+
+    def write(self, name: str, data: bytes, mime_type: str) -> str:
+        raise NotImplementedError
+
+    def read(self, name: str) -> bytes:
+        raise NotImplementedError
+
+class DirectorySink(AssetSink):
+    """Write images as files into a directory.
+
+    References are ``url_prefix/name``; by default the prefix is the
+    directory's own name, which resolves when the markdown file is saved
+    next to the directory.
+    """
+
+    def __init__(self, directory: str, url_prefix: Optional[str] = None):
+        self.directory = Path(directory)
+        self.url_prefix = Path(directory).name if url_prefix is None else url_prefix
+
+    def write(self, name: str, data: bytes, mime_type: str) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Unique temporary file, so concurrent writers of the same name don't clash
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=self.directory)
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        os.chmod(tmp_path, 0o644)  # mkstemp files are private
+        os.replace(tmp_path, self.directory / name)  # Readers never see partial files
+        return f"{self.url_prefix}/{name}" if self.url_prefix else name
+
+    def read(self, name: str) -> bytes:
+        return (self.directory / name).read_bytes()
+
+    def __repr__(self) -> str:
+        return f"DirectorySink({str(self.directory)!r}, url_prefix={self.url_prefix!r})"
@@ -1,5 +1,7 @@
 import re
-from typing import List, Tuple, Dict
+import heapq
+from collections import deque
+from typing import List, Tuple, Dict, Set, Optional, Any
 from dataclasses import dataclass
 
 @dataclass
@@ -16,6 +18,14 @@ class FootnoteProcessor:
         self.footnote_content_pattern = r'^\s*(?:(\d+)\.|\*)\s+(.+?)(?=\n\s*(?:\d+\.|\*)\s+|\Z)'
         self.footnote_markers = ['*', '†', '‡', '§']
         
+        # Single scanner for references and whole definition lines
+        self.footnote_ref_regex = re.compile(self.footnote_ref_pattern)
+        self.footnote_scanner = re.compile(
+            r'^[^\S\n]*(?:(?P<number>\d+)\.|\*)[^\S\n]+(?P<content>[^\n]+)$'
+            r'|\[(?P<ref>\d+|\*)\]',
+            re.MULTILINE
+        )
+        
     def is_likely_footnote_section(self, text: str, y_position: float, page_height: float) -> bool:
         """Determine if text block is likely a footnote section based on position and content."""
         # Check if text is in bottom third of page
@@ -26,76 +36,127 @@ class FootnoteProcessor:
         first_line = text.split('\n')[0].strip()
         return bool(re.match(r'(?:\d+[\.\)]|[\*†‡§])\s+', first_line))
         
-    def extract_footnotes(self, text: str, y_position: float = None, page_height: float = None) -> List[Footnote]:
-        """Extract footnotes from text."""
-        footnotes = []
-        
-        # First pass: find all footnote references
-        references = [(m.group(1) if m.group(1) else '*', m.start()) 
-                     for m in re.finditer(self.footnote_ref_pattern, text)]
-        
-        # Second pass: find footnote content
-        content_matches = re.finditer(self.footnote_content_pattern, text, re.MULTILINE)
-        
-        # Match references with content
-        ref_dict: Dict[str, List[int]] = {}  # id -> list of positions
-        for ref_id, pos in references:
-            if ref_id not in ref_dict:
-                ref_dict[ref_id] = []
-            ref_dict[ref_id].append(pos)
+    def scan(self, text: str) -> Tuple[List[Tuple[str, int, int]], List[Tuple[str, str, int, int]]]:
+        """Find footnote references and definitions in a single pass.
+        
+        Returns ``(references, definitions)`` in document order as
+        ``(id, start, end)`` and ``(id, content, start, end)`` tuples. A
+        definition line only counts if the next non-blank line is another
+        definition or it ends the text, so numbered lists in the body are
+        left alone.
+        """
+        references = []
+        definitions = []
+        pending = None  # Definition line waiting to see what follows it
+        
+        for match in self.footnote_scanner.finditer(text):
+            start, end = match.span()
+            if pending is not None:
+                if match.group('content') is not None and text[pending[3]:start].isspace():
+                    definitions.append(pending)
+                pending = None
+                
+            if match.group('ref') is not None:
+                references.append((match.group('ref'), start, end))
+                continue
+                
+            # References inside a definition still count
+            content_start, content_end = match.span('content')
+            for ref in self.footnote_ref_regex.finditer(text, content_start, content_end):
+                references.append((ref.group(1), ref.start(), ref.end()))
+            pending = (match.group('number') or '*', match.group('content').strip(), start, end)
             
-        # Process footnote content
-        for match in re.finditer(self.footnote_content_pattern, text, re.MULTILINE):
-            content = match.group(2).strip() if match.group(2) else match.group(1).strip()
-            content_pos = match.start()
+        if pending is not None and (pending[3] == len(text) or text[pending[3]:].isspace()):
+            definitions.append(pending)
             
-            # Determine footnote ID
-            footnote_id = match.group(1) if match.group(1) else '*'
+        return references, definitions
+        
+    def rewrite(self, text: str, references: List[Tuple[str, int, int]], definitions: List[Tuple[str, str, int, int]],
+                defined: Set[str], removed: Set[str]) -> str:
+        """Rewrite references to ``defined`` ids and drop definitions of ``removed`` ids in one pass."""
+        edits = heapq.merge(
+            ((start, end, f"[^{footnote_id}]") for footnote_id, start, end in references if footnote_id in defined),
+            # Drop the whole definition line, including its line break
+            ((start, end + 1 if text.startswith('\n', end) else end, '')
+             for footnote_id, _, start, end in definitions if footnote_id in removed)
+        )
+        
+        parts = []
+        last_end = 0
+        for start, end, replacement in edits:
+            if start < last_end:  # Reference inside a removed definition
+                continue
+            parts.append(text[last_end:start])
+            parts.append(replacement)
+            last_end = end
             
-            # Add footnote for each reference
-            if footnote_id in ref_dict:
-                for ref_pos in ref_dict[footnote_id]:
-                    footnotes.append(Footnote(
-                        id=footnote_id,
-                        content=content,
-                        reference_pos=ref_pos,
-                        content_pos=content_pos
-                    ))
-                
-        return sorted(footnotes, key=lambda f: f.reference_pos)
+        if not parts:
+            return text
+        parts.append(text[last_end:])
+        return ''.join(parts)
+        
+    def extract_footnotes(self, text: str, y_position: float = None, page_height: float = None) -> List[Footnote]:
+        """Extract footnotes from text, one per reference to a defined footnote."""
+        references, definitions = self.scan(text)
+        
+        contents: Dict[str, List[Tuple[str, int]]] = {}  # id -> [(content, position)]
+        for footnote_id, content, content_pos, _ in definitions:
+            contents.setdefault(footnote_id, []).append((content, content_pos))
+            
+        return [
+            Footnote(id=footnote_id, content=content, reference_pos=ref_pos, content_pos=content_pos)
+            for footnote_id, ref_pos, _ in references
+            for content, content_pos in contents.get(footnote_id, [])
+        ]
         
     def convert_to_markdown(self, text: str, y_position: float = None, page_height: float = None) -> str:
         """Convert footnotes to markdown format."""
         if not text:
             return text
             
-        footnotes = self.extract_footnotes(text, y_position, page_height)
-        if not footnotes:
+        references, definitions = self.scan(text)
+        referenced = {footnote_id for footnote_id, _, _ in references}
+        
+        found: Dict[str, str] = {}
+        for footnote_id, content, _, _ in definitions:
+            if footnote_id in referenced:
+                found.setdefault(footnote_id, content)
+        if not found:
             return text
             
-        result = text
-        offset = 0
-        footnote_section = "\n\n---\n"  # Horizontal rule before footnotes
-        
-        # Process footnotes in reverse order to maintain positions
-        for footnote in reversed(footnotes):
-            # Replace reference with markdown reference
-            ref_markdown = f"[^{footnote.id}]"
-            result = (
-                result[:footnote.reference_pos + offset] +
-                ref_markdown +
-                result[footnote.reference_pos + len(footnote.id) + 2 + offset:]
-            )
-            offset += len(ref_markdown) - (len(footnote.id) + 2)
-            
-            # Add footnote content to footnote section
-            footnote_section += f"\n[^{footnote.id}]: {footnote.content}"
+        # Footnote section in order of first reference
+        ordered = {footnote_id: found[footnote_id] for footnote_id, _, _ in references if footnote_id in found}
+        result = self.rewrite(text, references, definitions, found, found)
+        return result.strip() + "\n\n" + self.footnote_section(ordered)
+        
+    def convert_chunk(self, text: str, definitions: Dict[str, str], referenced: Set[str]) -> str:
+        """Convert footnotes in one chunk of a streamed document.
+        
+        ``definitions`` and ``referenced`` carry the open footnote state
+        between chunks: references are recorded in ``referenced``, and
+        definitions of referenced footnotes are moved from the text into
+        ``definitions``. References to any footnote defined so far are
+        rewritten. Emit ``footnote_section(definitions)`` after the last chunk.
+        """
+        if not text:
+            return text
             
-        # Remove original footnote content and add markdown footnotes at the end
-        result = re.sub(self.footnote_content_pattern, '', result, flags=re.MULTILINE)
-        result = result.strip() + footnote_section
+        references, chunk_definitions = self.scan(text)
+        referenced.update(footnote_id for footnote_id, _, _ in references)
         
-        return result
+        for footnote_id, content, _, _ in chunk_definitions:
+            if footnote_id in referenced:
+                definitions.setdefault(footnote_id, content)
+                
+        return self.rewrite(text, references, chunk_definitions, definitions, referenced)
+        
+    def footnote_section(self, definitions: Dict[str, str]) -> str:
+        """Render collected footnote definitions as a markdown footnote section."""
+        if not definitions:
+            return ""
+        return "---\n" + "".join(
+            f"\n[^{footnote_id}]: {content}" for footnote_id, content in definitions.items()
+        )
         
     def merge_footnotes(self, texts: List[str]) -> str:
         """Merge footnotes from multiple text blocks/pages."""
@@ -124,3 +185,119 @@ class FootnoteProcessor:
                 result += f"\n[^{footnote_id}]: {content}"
                 
         return result
+
+
+class FootnoteAccumulator:
+    """Cross-page footnote state for streaming conversion.
+    
+    Definitions are taken from page blocks that the block positions place
+    in a footnote region (see ``FootnoteProcessor.is_likely_footnote_section``),
+    once one of their ids has been referenced. Pages that reference
+    footnotes not defined yet are held back so that definitions continued on
+    a later page still resolve; at most ``max_pending_pages`` pages are held,
+    after which the oldest is released with its open references unchanged.
+    """
+    
+    def __init__(self, processor: Optional[FootnoteProcessor] = None, max_pending_pages: int = 8):
+        self.processor = processor or FootnoteProcessor()
+        self.max_pending_pages = max_pending_pages
+        self.definitions: Dict[str, str] = {}
+        self.referenced: Set[str] = set()
+        self._pending = deque()  # [text, context, references, unresolved ids] per held page
+        
+        self.marker_pattern = re.compile(r'(?:(\d+)[\.\)]|([\*†‡§]))\s+')
+        self.next_marker_pattern = re.compile(r'(?<=\s)(\d+)[\.\)]\s+')
+        
+    def parse_definitions(self, text: str) -> List[Tuple[str, str]]:
+        """Split a footnote block into (id, content) pairs.
+        
+        A block may hold several consecutively numbered footnotes, so a
+        numbered marker inside the text starts a new footnote only if it
+        continues the numbering.
+        """
+        text = text.strip()
+        match = self.marker_pattern.match(text)
+        if match is None:
+            return []
+            
+        notes = []
+        footnote_id = match.group(1) or match.group(2)
+        content_start = match.end()
+        while True:
+            following = None
+            if footnote_id.isdigit():
+                expected = str(int(footnote_id) + 1)
+                for candidate in self.next_marker_pattern.finditer(text, content_start):
+                    if candidate.group(1) == expected:
+                        following = candidate
+                        break
+            content_end = following.start() if following else len(text)
+            notes.append((footnote_id, text[content_start:content_end].strip()))
+            if following is None:
+                return notes
+            footnote_id, content_start = following.group(1), following.end()
+            
+    def take_definitions(self, text: str, blocks: List[Dict], page_height: float = 1.0) -> List[Tuple[int, int]]:
+        """Record a page's references and collect the definitions in its footnote blocks.
+        
+        ``blocks`` are the page's structured blocks, with ``position`` the
+        end offset of each block in ``text`` and ``y`` relative to
+        ``page_height``. Returns the sorted (start, end) ranges of ``text``
+        taken up by definition blocks, including their line breaks, for the
+        caller to cut out.
+        """
+        self.referenced.update(match.group(1) for match in self.processor.footnote_ref_regex.finditer(text))
+        
+        ranges = []
+        for block in blocks:
+            if not self.processor.is_likely_footnote_section(block['text'], block['y'], page_height):
+                continue
+            notes = self.parse_definitions(block['text'])
+            if not any(footnote_id in self.referenced for footnote_id, _ in notes):
+                continue
+            for footnote_id, content in notes:
+                self.definitions.setdefault(footnote_id, content)
+                
+            end = block['position']
+            start = end - len(block['text'])
+            if start > 0:
+                start -= 1  # Line break before the block
+            else:
+                end = min(end + 1, len(text))  # Line break after the first block
+            if ranges and start < ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        return ranges
+        
+    def add_page(self, text: str, context: Any = None) -> List[Tuple[str, Any]]:
+        """Queue a page's (processed) text and get the pages that are ready, in order.
+        
+        ``context`` is passed back with the page, e.g. its images. References
+        to defined footnotes are rewritten in the released text.
+        """
+        references = [(match.group(1), match.start(), match.end())
+                      for match in self.processor.footnote_ref_regex.finditer(text)]
+        self.referenced.update(footnote_id for footnote_id, _, _ in references)
+        unresolved = {footnote_id for footnote_id, _, _ in references if footnote_id not in self.definitions}
+        self._pending.append([text, context, references, unresolved])
+        return self._release()
+        
+    def finish(self) -> List[Tuple[str, Any]]:
+        """Release all held pages after the last page."""
+        return self._release(flush=True)
+        
+    def footnote_section(self) -> str:
+        """Render the collected definitions as a markdown footnote section."""
+        return self.processor.footnote_section(self.definitions)
+        
+    def _release(self, flush: bool = False) -> List[Tuple[str, Any]]:
+        ready = []
+        while self._pending:
+            text, context, references, unresolved = self._pending[0]
+            unresolved.difference_update(self.definitions)
+            if unresolved and not flush and len(self._pending) <= self.max_pending_pages:
+                break
+            self._pending.popleft()
+            ready.append((self.processor.rewrite(text, references, [], self.definitions, set()), context))
+        return ready
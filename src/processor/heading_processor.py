@@ -1,7 +1,12 @@
 import re
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Set, Union, Optional
 from dataclasses import dataclass
 
+from .page_layout import SpanRuns, FontStatistics
+
+# Font lookup: a span-run table by character offset, or (size, bold) by line index
+FontInfo = Union[SpanRuns, Dict[int, Tuple[float, bool]]]
+
 @dataclass
 class Heading:
     text: str
@@ -21,16 +26,41 @@ class HeadingProcessor:
             r'^[A-Z][A-Z\s]+[A-Z]$'  # All caps style
         ]
         
+        # Precompiled once; the first alternative that matches names the style
+        self.heading_regex = re.compile(
+            r'(?P<numbered>\d+(?:\.\d+)*\.?\s+.+$)'
+            r'|(?P<markdown>(?P<hashes>#{1,6})\s+.+$)'
+            r'|(?P<title>[A-Z][A-Za-z\s]+:)'
+            r'|(?P<caps>[A-Z][A-Z\s]+[A-Z]$)'
+        )
+        self.number_regex = re.compile(r'\d+')
+        self.heading_prefix_regex = re.compile(r'^[\d\.#\s]+')
+        self.trailing_colon_regex = re.compile(r':$')
+        self.anchor_invalid_regex = re.compile(r'[^\w\-]')
+        
     def detect_heading_level(self, text: str, font_size: float = None, 
-                           is_bold: bool = False, prev_headings: List[Heading] = None) -> int:
-        """Determine the appropriate heading level."""
+                           is_bold: bool = False, prev_headings: List[Heading] = None,
+                           font_stats: Optional[FontStatistics] = None) -> int:
+        """Determine the appropriate heading level.
+        
+        With document ``font_stats`` the level follows the line's font
+        relative to the body font, and body text skips the pattern checks;
+        without them fixed size thresholds are used.
+        """
         if not text or len(text) < self.min_heading_length or len(text) > self.max_heading_length:
             return 0
             
-        # Check if it matches any heading patterns
-        is_heading_pattern = any(re.match(pattern, text) for pattern in self.heading_patterns) or re.match(r'^\d+(?:\.\d+)*\.?\s+.+$', text)
-        
-        if font_size is not None:
+        if font_stats is not None:
+            level = font_stats.heading_level(font_size, is_bold)
+            if level:
+                # Numbering nests headings that share a font, e.g. 2.1 under 2
+                match = self.heading_regex.match(text)
+                if match is not None and match.lastgroup == 'numbered':
+                    level += len(self.number_regex.findall(text.split()[0])) - 1
+                return min(level, 6)
+            if level is not None:
+                return level
+        elif font_size is not None:
             # Use font size to determine heading level
             if font_size >= 20:
                 return 1
@@ -42,38 +72,35 @@ class HeadingProcessor:
                 return 4
         
         # Use pattern matching if no font size info
-        if is_heading_pattern:
+        match = self.heading_regex.match(text)
+        if match is None:
+            return 0
+            
+        style = match.lastgroup
+        if style == 'numbered':
             # Check numbered pattern depth (e.g., 1.2.3)
-            if re.match(r'^\d+(?:\.\d+)*\.?\s+.+$', text):
-                # Count the number of numbers
-                numbers = re.findall(r'\d+', text.split()[0])
-                return min(len(numbers), 6)
+            return min(len(self.number_regex.findall(text.split()[0])), 6)
+        elif style == 'markdown':
             # Check markdown style depth
-            elif match := re.match(r'^(#{1,6})\s+.+$', text):
-                return len(match.group(1))
+            return len(match.group('hashes'))
+        elif style == 'title':
             # Check title case with colon
-            elif re.match(r'^[A-Z][A-Za-z\s]+:', text):
-                return 2
-            # Check all caps
-            elif text.isupper() and len(text.split()) <= 4:
-                return 2
-            # Other patterns default to level 3
-            return 3
-            
-        return 0
+            return 2
+        # All caps, short headings rank higher
+        return 2 if text.isupper() and len(text.split()) <= 4 else 3
+        
+    def normalize_heading_levels(self, headings: List[Heading], levels: Set[int] = None) -> List[Heading]:
+        """Ensure heading levels are properly nested.
         
-    def normalize_heading_levels(self, headings: List[Heading]) -> List[Heading]:
-        """Ensure heading levels are properly nested."""
+        ``levels`` are the raw levels to rank against; by default only the
+        levels of ``headings`` are used. Streaming callers pass the levels
+        seen so far in the document so that ranks stay stable across pages.
+        """
         if not headings:
             return headings
             
-        # Create a map of original levels
-        level_map = {heading.level: [] for heading in headings}
-        for heading in headings:
-            level_map[heading.level].append(heading)
-            
         # Sort levels in ascending order
-        sorted_levels = sorted(level_map.keys())
+        sorted_levels = sorted(levels if levels is not None else {heading.level for heading in headings})
         
         # Create new level mapping
         new_level_map = {}
@@ -86,10 +113,24 @@ class HeadingProcessor:
             
         return headings
         
-    def extract_headings(self, text: str, font_info: Dict[int, Tuple[float, bool]] = None) -> List[Heading]:
-        """Extract headings from text with their levels."""
+    def extract_headings(self, text: str, font_info: FontInfo = None,
+                         normalize: bool = True, font_stats: Optional[FontStatistics] = None) -> List[Heading]:
+        """Extract headings from text with their levels.
+        
+        ``font_info`` is either a ``SpanRuns`` table keyed by character
+        offset, or a mapping of line index to (size, bold). Font statistics
+        are computed from a ``SpanRuns`` table unless ``font_stats`` for the
+        whole document are given. With ``normalize=False`` the raw detected
+        levels are returned.
+        """
         headings = []
         lines = text.split('\n')
+        line_fonts = None
+        if isinstance(font_info, SpanRuns):
+            line_fonts = font_info.line_fonts(text)
+            if font_stats is None:
+                font_stats = FontStatistics()
+                font_stats.add(font_info, len(text))
         
         for i, line in enumerate(lines):
             line = line.strip()
@@ -99,7 +140,10 @@ class HeadingProcessor:
             # Get font info if available
             font_size = None
             is_bold = False
-            if font_info and i in font_info:
+            if line_fonts is not None:
+                if line_fonts[i]:
+                    font_size, is_bold = line_fonts[i]
+            elif font_info and i in font_info:
                 font_size, is_bold = font_info[i]
                 
             # Detect heading level
@@ -107,7 +151,8 @@ class HeadingProcessor:
                 line, 
                 font_size, 
                 is_bold,
-                headings
+                headings,
+                font_stats
             )
             
             if level > 0:
@@ -119,14 +164,27 @@ class HeadingProcessor:
                     is_bold=is_bold
                 ))
                 
-        return self.normalize_heading_levels(headings)
+        return self.normalize_heading_levels(headings) if normalize else headings
         
-    def convert_to_markdown(self, text: str, font_info: Dict[int, Tuple[float, bool]] = None) -> str:
+    def convert_to_markdown(self, text: str, font_info: FontInfo = None) -> str:
         """Convert headings to proper markdown format."""
         if not text:
             return text
             
-        headings = self.extract_headings(text, font_info)
+        return self.apply_headings(text, self.extract_headings(text, font_info))
+        
+    def analyze(self, text: str, font_info: FontInfo = None,
+                font_stats: Optional[FontStatistics] = None) -> Tuple[str, List[Heading], str]:
+        """Detect headings once and return (markdown, headings, table of contents)."""
+        headings = self.extract_headings(text, font_info, font_stats=font_stats)
+        return self.apply_headings(text, headings), headings, self.get_table_of_contents(headings)
+        
+    def clean_heading_text(self, text: str) -> str:
+        """Strip numbering, markdown hashes and a trailing colon from heading text."""
+        return self.trailing_colon_regex.sub('', self.heading_prefix_regex.sub('', text.strip()))
+        
+    def apply_headings(self, text: str, headings: List[Heading]) -> str:
+        """Rewrite the lines of ``text`` at the headings' positions as markdown headings."""
         if not headings:
             return text
             
@@ -140,10 +198,8 @@ class HeadingProcessor:
         for i, line in enumerate(lines):
             if i in heading_positions:
                 heading = heading_positions[i]
-                # Clean heading text
-                clean_text = re.sub(r'^[\d\.#\s]+', '', line.strip())
-                clean_text = re.sub(r':$', '', clean_text)
                 # Add markdown heading
+                clean_text = self.clean_heading_text(line)
                 result.append(f"{'#' * heading.level} {clean_text}")
             else:
                 result.append(line)
@@ -160,12 +216,9 @@ class HeadingProcessor:
         for heading in headings:
             # Calculate indent based on level
             indent = "  " * (heading.level - 1)
-            # Clean heading text
-            clean_text = re.sub(r'^[\d\.#\s]+', '', heading.text.strip())
-            clean_text = re.sub(r':$', '', clean_text)
+            clean_text = self.clean_heading_text(heading.text)
             # Create anchor link
-            anchor = clean_text.lower().replace(' ', '-')
-            anchor = re.sub(r'[^\w\-]', '', anchor)
+            anchor = self.anchor_invalid_regex.sub('', clean_text.lower().replace(' ', '-'))
             # Add TOC entry
             toc.append(f"{indent}- [{clean_text}](#{anchor})")
             
@@ -1,100 +1,475 @@
 import os
 import fitz
 import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
-from typing import List, Dict, Any
-import tempfile
+from typing import List, Dict, Tuple, Any, Optional
 import io
 
+from .page_layout import PageLayout
+from .assets import AssetSink
+from ..instrumentation import Instrumentation, stage
+
+# File extension for each image MIME type written to an asset sink
+IMAGE_EXTENSIONS = {'image/png': 'png', 'image/jpeg': 'jpg', 'image/webp': 'webp'}
+
+# MIME type of each PIL output format
+IMAGE_FORMATS = {'PNG': 'image/png', 'JPEG': 'image/jpeg', 'WEBP': 'image/webp'}
+
+ICON_SIZE = 64  # Images no larger than this on both sides are icons
+MAX_DIAGRAM_COLORS = 256  # Line art and charts; images with more colors are photos
+
+# Image blocks that are fragments rather than pictures (see select_image_blocks)
+MIN_IMAGE_AREA = 12 * 12  # Square points; smaller blocks are bullets and specks
+MAX_ASPECT_RATIO = 20  # Longer and thinner blocks are rules and borders
+MIN_SOURCE_PIXELS = 64  # Spacers and color fills stretched over the block
+FRAGMENT_GAP = 2  # Points between fragments drawn as parts of one picture
+
+MAX_INLINE_IMAGES = 16  # Recently used data URIs kept for reuse (see document_images)
+
 class ImageProcessor:
-    def __init__(self, dpi: int = 300):
-        self.dpi = dpi
+    def __init__(self, dpi: int = 300, instrumentation: Optional[Instrumentation] = None,
+                 asset_sink: Optional[AssetSink] = None, max_dimension: int = 800,
+                 encode_threads: int = 0, image_quality: int = 75, photo_format: str = 'JPEG'):
+        """Create an image processor.
+        
+        Each image is encoded with the settings of its category in
+        ``quality_settings`` (see ``classify_image``): photos as
+        ``photo_format`` ('JPEG' or 'WEBP') with ``image_quality`` (1-100),
+        diagrams and icons as lossless PNG. The ``quality`` of a category
+        only applies to JPEG and WebP.
+        
+        With ``encode_threads`` > 0, images are optimized and encoded in that
+        many background threads while the converter goes on extracting
+        pages; rendering stays on the calling thread since MuPDF is not
+        thread-safe. At most twice that many images are queued or encoding
+        at a time.
+        """
+        if not 1 <= image_quality <= 100:
+            raise ValueError(f"image_quality must be between 1 and 100, got {image_quality}")
+        if photo_format.upper() not in ('JPEG', 'WEBP'):
+            raise ValueError(f"photo_format must be 'JPEG' or 'WEBP', got {photo_format!r}")
+            
+        self.dpi = dpi  # Highest resolution images are rendered at
+        self.max_dimension = max_dimension  # Longest side of output images, in pixels
+        self.instrumentation = instrumentation
+        self.asset_sink = asset_sink  # Write images as files instead of data URIs
+        self.quality_settings = {
+            'photo': {'format': photo_format.upper(), 'quality': image_quality},
+            'diagram': {'format': 'PNG', 'quality': image_quality},
+            'icon': {'format': 'PNG', 'quality': image_quality}
+        }
+        self._document = None  # Token of the document the image references below belong to
+        self._document_images = OrderedDict()
+        self.encode_threads = encode_threads
+        self._executor = None  # Started on first use
+        self._slots = None  # Bounds the images queued for encoding
+        self._info_page = None  # Page the image info below belongs to
+        self._page_image_info = {}
+        
+    def __getstate__(self) -> Dict[str, Any]:
+        # Sent to worker processes: documents, threads and locks are not picklable, each worker starts afresh
+        return {**self.__dict__, '_document': None, '_document_images': OrderedDict(), '_executor': None, '_slots': None,
+                '_info_page': None, '_page_image_info': {}}
         
-    def extract_images(self, page: fitz.Page, temp_dir: str) -> List[Dict[str, Any]]:
-        """Extract images from a PDF page."""
+    def document_images(self, doc: fitz.Document) -> Dict[Any, Dict[str, str]]:
+        """Image references already produced for ``doc``, by xref and by content hash.
+        
+        The references are kept until images of another document are
+        extracted. Asset sink paths are small and all are kept; inline data
+        URIs are as large as the images, so only the ``MAX_INLINE_IMAGES``
+        most recently used are, keeping memory bounded while streaming.
+        """
+        # page.parent may be a new proxy on every call, so identify the document by a token stored on it
+        token = getattr(doc, '_image_processor_token', None)
+        if token is None:
+            token = doc._image_processor_token = object()
+        if token is not self._document:
+            self._document = token
+            self._document_images = OrderedDict()
+        return self._document_images
+        
+    def remember_image(self, seen: Dict[Any, Dict[str, str]], key: Any, img_ref: Dict[str, str]) -> None:
+        """Keep ``img_ref`` under ``key`` in ``document_images`` as the most recently used."""
+        seen[key] = img_ref
+        seen.move_to_end(key)
+        if self.asset_sink is None:
+            while len(seen) > MAX_INLINE_IMAGES:
+                seen.popitem(last=False)
+        
+    def extract_images(self, page: fitz.Page, temp_dir: Optional[str] = None,
+                       layout: Optional[PageLayout] = None, wait: bool = False) -> List[Dict[str, Any]]:
+        """Extract images from a PDF page.
+
+        Images are returned as soon as their placement is known, each with
+        an ``ImageHandle`` under ``pending`` that renders and encodes it on
+        first use, so callers that only need text or some of the images pay
+        nothing for the rest. ``wait_images`` replaces the handles with the
+        images' ``data`` or ``src`` while the page's document is open; pass
+        ``wait=True`` to do so here.
+        
+        Decorative fragments are skipped or merged before anything is
+        rendered (see ``select_image_blocks``). Images embedded as plain
+        JPEG or PNG streams are taken from the file as they are; only
+        masked, transformed, clipped or vector images are rendered from the
+        page. Images repeated within a document, such as logos, are
+        processed once and later occurrences reuse the first reference (see
+        ``document_images``). Images are processed in memory, so
+        ``temp_dir`` is no longer used. Pass the page's ``layout`` when it
+        has already been parsed to avoid a second ``get_text("dict")`` call.
+        """
         images = []
         
         try:
-            # Get page dimensions
-            page_width = page.rect.width
-            page_height = page.rect.height
-            
             # Extract image blocks
-            blocks = page.get_text("dict")["blocks"]
-            for block_idx, block in enumerate(blocks):
-                if block["type"] == 1:  # Image block
-                    try:
-                        # Get image rectangle
-                        bbox = block["bbox"]
-                        rect = fitz.Rect(bbox)
-                        
-                        # Add some padding to capture full image
-                        padding = 2  # pixels
-                        rect.x0 = max(0, rect.x0 - padding)
-                        rect.y0 = max(0, rect.y0 - padding)
-                        rect.x1 = min(page_width, rect.x1 + padding)
-                        rect.y1 = min(page_height, rect.y1 + padding)
-                        
-                        # Render page region to pixmap with high resolution
-                        zoom = self.dpi / 72  # Convert DPI to zoom factor
-                        mat = fitz.Matrix(zoom, zoom)
-                        pix = page.get_pixmap(matrix=mat, clip=rect, alpha=False)
-                        
-                        # Save pixmap to temp file
-                        img_path = os.path.join(temp_dir, f'block_{block_idx}.png')
-                        pix.save(img_path)
-                        
-                        # Optimize image
-                        self.optimize_image(img_path)
-                        
-                        # Convert to base64
-                        with open(img_path, 'rb') as img_file:
-                            img_data = img_file.read()
-                            img_b64 = base64.b64encode(img_data).decode('utf-8')
-                            
-                        # Add to images list
-                        images.append({
-                            'data': f"data:image/png;base64,{img_b64}",
-                            'x': bbox[0] / page_width,
-                            'y': bbox[1] / page_height,
-                            'width': (bbox[2] - bbox[0]) / page_width,
-                            'height': (bbox[3] - bbox[1]) / page_height,
-                            'alt': f"Image {block_idx + 1}"
-                        })
-                        
-                    except Exception as e:
-                        print(f"Warning: Failed to extract image block: {str(e)}")
-                        continue
-                        
+            if layout is None:
+                layout = PageLayout.from_page(page)
+                
+            # Drop or merge decorative fragments before anything is rendered
+            for block_idx, block in self.select_image_blocks(layout.image_blocks):
+                images.append({
+                    'pending': ImageHandle(self, page, block_idx, block),
+                    **layout.normalize_bbox(block["bbox"]),
+                    'alt': f"Image {block_idx + 1}"
+                })
+                
+            if wait:
+                self.wait_images(images)
             return images
             
         except Exception as e:
             print(f"Warning: Failed to extract images from page: {str(e)}")
             return []
             
-    def optimize_image(self, img_path: str, max_size: int = 800) -> None:
-        """Optimize image size while maintaining quality."""
-        try:
-            with Image.open(img_path) as img:
-                # Convert to RGB if needed
-                if img.mode in ['RGBA', 'LA']:
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'RGBA':
-                        background.paste(img, mask=img.split()[3])
-                    else:
-                        background.paste(img, mask=img.split()[1])
-                    img = background
-                elif img.mode not in ['RGB', 'L']:
-                    img = img.convert('RGB')
+    def image_ref(self, page: fitz.Page, block_idx: int, block: Dict[str, Any]) -> Dict[str, Any]:
+        """Pass through or render a selected image block and reference the result.
+        
+        Returns ``{'pending': future}`` while the image is encoded in a thread.
+        """
+        info = None if 'fragments' in block else self.page_image_info(page).get(block_idx)
+        embedded = self.embedded_image(page.parent, block, info)
+        if embedded is not None:
+            # The passed-through stream depends on the xref alone
+            xref_key = ('xref', info['xref'])
+        elif info is not None and info.get('xref'):
+            # The same image drawn at the same size and orientation renders the same
+            x0, y0, x1, y1 = block['bbox']
+            xref_key = ('xref', info['xref'], round(x1 - x0), round(y1 - y0),
+                        tuple(round(value, 2) for value in info['transform'][:4]))
+        else:
+            xref_key = None  # Inline or vector image, or merged fragments
+            
+        seen = self.document_images(page.parent)
+        img_ref = seen.get(xref_key)
+        if img_ref is None:
+            if embedded is not None:
+                img_ref = self.embedded_image_ref(embedded, page.number, seen)
+            else:
+                img_ref = self.render_image(page, block, seen)
+        if xref_key is not None:
+            self.remember_image(seen, xref_key, img_ref)
+        return img_ref
+        
+    def page_image_info(self, page: fitz.Page) -> Dict[int, Dict[str, Any]]:
+        """Image info with xrefs of a page by block number, kept for the most recent page."""
+        if page is not self._info_page:
+            self._info_page = page
+            self._page_image_info = {info['number']: info for info in page.get_image_info(xrefs=True)}
+        return self._page_image_info
+        
+    def select_image_blocks(self, image_blocks: List[Tuple[int, Dict[str, Any]]]) -> List[Tuple[int, Dict[str, Any]]]:
+        """Choose the image blocks worth rendering, in block order.
+        
+        Blocks that are tiny, very thin, drawn from a handful of source
+        pixels or from a single row or column of them are fragments:
+        bullets, rules, spacers, or slices and gradient strips of a larger
+        picture. Fragments that touch or overlap are merged into a region,
+        returned as a block with only a ``bbox`` and the number of
+        ``fragments``, that is rendered once; lone fragments and merged
+        regions that are still fragments are dropped.
+        """
+        selected = []
+        regions = []  # [x0, y0, x1, y1, index of the first block, number of blocks], none touching
+        for block_idx, block in image_blocks:
+            bbox = tuple(block['bbox'])
+            if not self.is_fragment(bbox, (block.get('width', 0), block.get('height', 0))):
+                selected.append((block_idx, block))
+                continue
+                
+            region = [*bbox, block_idx, 1]
+            touching = [other for other in regions if self._touches(region, other)]
+            while touching:
+                regions = [other for other in regions if not self._touches(region, other)]
+                for other in touching:
+                    region = [min(region[0], other[0]), min(region[1], other[1]),
+                              max(region[2], other[2]), max(region[3], other[3]),
+                              min(region[4], other[4]), region[5] + other[5]]
+                # The grown region may reach further fragments
+                touching = [other for other in regions if self._touches(region, other)]
+            regions.append(region)
+            
+        for *bbox, block_idx, count in regions:
+            if count > 1 and not self.is_fragment(bbox):
+                selected.append((block_idx, {'bbox': tuple(bbox), 'fragments': count}))
+        return sorted(selected, key=lambda item: item[0])
+        
+    def is_fragment(self, bbox: Tuple[float, float, float, float],
+                    source_size: Optional[Tuple[int, int]] = None) -> bool:
+        """Whether an image region is too small or thin, or its source too tiny, to be a picture."""
+        width, height = bbox[2] - bbox[0], bbox[3] - bbox[1]
+        if width * height < MIN_IMAGE_AREA or max(width, height) > MAX_ASPECT_RATIO * min(width, height):
+            return True
+        if source_size is None:
+            return False
+        source_width, source_height = source_size
+        return min(source_width, source_height) <= 1 or source_width * source_height < MIN_SOURCE_PIXELS
+        
+    def _touches(self, first: List[float], second: List[float]) -> bool:
+        return (first[0] - FRAGMENT_GAP <= second[2] and second[0] - FRAGMENT_GAP <= first[2] and
+                first[1] - FRAGMENT_GAP <= second[3] and second[1] - FRAGMENT_GAP <= first[3])
+        
+    def embedded_image(self, doc: fitz.Document, block: Dict[str, Any],
+                       info: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Get the embedded image stream shown by an image block, if it can be used as is.
+        
+        Returns the ``doc.extract_image`` result, or None when the block must
+        be rendered: inline or vector images, soft or color-key masks, rotated
+        or flipped placement, clipping, and formats or color spaces that
+        browsers do not display.
+        """
+        if info is None or not info.get('xref') or info.get('has-mask') or block.get('mask'):
+            return None
+            
+        # Axis-aligned, upright placement showing the whole image
+        a, b, c, d, _, _ = info['transform']
+        if abs(b) > 1e-3 or abs(c) > 1e-3 or a <= 0 or d <= 0:
+            return None
+        if any(abs(x - y) > 1 for x, y in zip(block['bbox'], info['bbox'])):
+            return None
+            
+        xref = info['xref']
+        for key in ('Mask', 'Decode', 'ImageMask'):
+            if doc.xref_get_key(xref, key)[0] != 'null':
+                return None
+                
+        image = doc.extract_image(xref)
+        if not image or image['ext'] not in ('jpeg', 'png') or image['smask'] or image['colorspace'] not in (1, 3):
+            return None
+        return image
+        
+    def embedded_image_ref(self, image: Dict[str, Any], page_number: int,
+                           seen: Optional[Dict[Any, Dict[str, str]]] = None) -> Dict[str, str]:
+        """Reference an embedded image, downscaling it first if it exceeds the maximum size.
+        
+        With ``seen``, an image whose bytes were referenced before reuses that reference.
+        """
+        if seen is not None:
+            content_key = ('embedded', hashlib.sha256(image['image']).digest())
+            img_ref = seen.get(content_key) or self.embedded_image_ref(image, page_number)
+            self.remember_image(seen, content_key, img_ref)
+            return img_ref
+            
+        if max(image['width'], image['height']) <= self.max_dimension:
+            mime_type = 'image/jpeg' if image['ext'] == 'jpeg' else 'image/png'
+            return self.package_image(image['image'], mime_type)
+            
+        # Decode and shrink the embedded image; the page itself is not rendered
+        img = Image.open(io.BytesIO(image['image']))
+        return self.submit(self.optimized_image_ref, img, page_number)
+            
+    def render_image(self, page: fitz.Page, block: Dict[str, Any],
+                     seen: Optional[Dict[Any, Dict[str, str]]] = None) -> Dict[str, str]:
+        """Render the page region of an image block and reference the optimized result.
+        
+        With ``seen``, a rendering identical to an earlier one reuses its reference.
+        """
+        # Get image rectangle
+        rect = fitz.Rect(block["bbox"])
+        
+        # Add some padding to capture full image
+        padding = 2  # pixels
+        rect.x0 = max(0, rect.x0 - padding)
+        rect.y0 = max(0, rect.y0 - padding)
+        rect.x1 = min(page.rect.width, rect.x1 + padding)
+        rect.y1 = min(page.rect.height, rect.y1 + padding)
+        
+        # Render page region directly at the output size, capped at the DPI
+        zoom = min(self.dpi / 72, self.max_dimension / max(rect.width, rect.height, 1))
+        mat = fitz.Matrix(zoom, zoom)
+        with stage(self.instrumentation, 'render', page.number) as timer:
+            pix = page.get_pixmap(matrix=mat, clip=rect, alpha=False)
+            timer.add_bytes(len(pix.samples_mv))
+            
+        img = self.pixmap_to_image(pix)
+        
+        def encode(img: Image.Image, pix: fitz.Pixmap) -> Dict[str, str]:
+            # img shares the samples of pix, which is passed along to keep it alive until encoded
+            return self.optimized_image_ref(img, page.number)
+            
+        if seen is None:
+            return self.submit(encode, img, pix)
+        digest = hashlib.sha256(pix.samples_mv)
+        digest.update(repr((pix.width, pix.height, pix.n)).encode('utf-8'))
+        content_key = ('rendered', digest.digest())
+        img_ref = seen.get(content_key) or self.submit(encode, img, pix)
+        self.remember_image(seen, content_key, img_ref)
+        return img_ref
+        
+    def pixmap_to_image(self, pix: fitz.Pixmap) -> Image.Image:
+        """Wrap a pixmap's samples in a PIL image without copying or encoding them."""
+        if pix.colorspace is not None and pix.colorspace.n > 3:
+            pix = fitz.Pixmap(fitz.csRGB, pix)  # CMYK
+        mode = {1: 'L', 2: 'LA', 3: 'RGB', 4: 'RGBA'}[pix.n]
+        return Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, 'raw', mode, pix.stride, 1)
+        
+    def submit(self, function, *args) -> Dict[str, Any]:
+        """Produce an image reference with ``function(*args)`` in an encoding thread.
+        
+        Returns ``{'pending': future}`` for ``ImageHandle.result`` to resolve,
+        or the reference itself when ``encode_threads`` is 0. Blocks while the
+        encoding queue is full.
+        """
+        if not self.encode_threads:
+            return function(*args)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.encode_threads, thread_name_prefix='image-encode')
+            self._slots = threading.BoundedSemaphore(2 * self.encode_threads)
+        self._slots.acquire()
+        future = self._executor.submit(function, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        return {'pending': future}
+        
+    def close(self) -> None:
+        """Stop the encoding threads once queued images are done; they start again on next use."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._slots = None
+            
+    def start_images(self, images: List[Dict[str, Any]]) -> None:
+        """Render pending images and start encoding them, without waiting for the results."""
+        for img in images:
+            if 'pending' in img:
+                img['pending'].start()
                 
-                # Check if resize needed
-                if max(img.size) > max_size:
-                    # Calculate new size maintaining aspect ratio
-                    ratio = max_size / max(img.size)
-                    new_size = tuple(int(dim * ratio) for dim in img.size)
-                    # Resize with high quality
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
+    def wait_images(self, images: List[Dict[str, Any]]) -> None:
+        """Produce the ``data`` or ``src`` of pending images, in place and in order.
+        
+        All images are started first so encoding threads work on them
+        together. Images that could not be produced are removed from the list.
+        """
+        self.start_images(images)
+        finished = []
+        for img in images:
+            handle = img.pop('pending', None)
+            if handle is not None:
+                try:
+                    img.update(handle.result())
+                except Exception as e:
+                    print(f"Warning: Failed to extract image block: {str(e)}")
+                    continue
+            finished.append(img)
+        images[:] = finished
+        
+    def optimized_image_ref(self, img: Image.Image, page_number: int) -> Dict[str, str]:
+        """Optimize an image, encode it once in memory and reference the result."""
+        with stage(self.instrumentation, 'optimize_image', page_number) as timer:
+            img = self.prepare_image(img)
+            category, colors = self.classify_image(img)
+            settings = self.quality_settings[category]
+            data = self.encode_image(img, settings['format'], settings['quality'], colors)
+            timer.add_bytes(len(data))
+        return self.package_image(data, IMAGE_FORMATS[settings['format']])
+        
+    def classify_image(self, img: Image.Image) -> Tuple[str, Optional[List[Tuple[int, Any]]]]:
+        """Get the ``quality_settings`` category of a prepared image and its colors.
+        
+        The category is 'icon', 'diagram' or 'photo': small images are icons;
+        images with few distinct colors, such as line art, charts and
+        rendered text, are diagrams; the rest are photos. The colors are
+        ``img.getcolors(MAX_DIAGRAM_COLORS)``, None for photos, to pass on
+        to ``encode_image``.
+        """
+        colors = img.getcolors(MAX_DIAGRAM_COLORS)  # None once there are more colors
+        if max(img.size) <= ICON_SIZE:
+            return 'icon', colors
+        if colors is not None:
+            return 'diagram', colors
+        return 'photo', None
+        
+    def encode_image(self, img: Image.Image, format: str = 'PNG', quality: int = 75,
+                     colors: Optional[List[Tuple[int, Any]]] = None) -> bytes:
+        """Encode an image as PNG, or as JPEG or WebP with ``quality``.
+        
+        With the image's ``colors`` from ``classify_image``, gray PNGs are
+        stored with a single channel.
+        """
+        buffer = io.BytesIO()
+        if format == 'PNG':
+            # Gray line art on RGB pixmaps compresses better with a single channel
+            if img.mode == 'RGB' and colors is not None and all(r == g == b for _, (r, g, b) in colors):
+                img = img.convert('L')
+            img.save(buffer, 'PNG')
+        else:
+            img.save(buffer, format, quality=quality)
+        return buffer.getvalue()
+        
+    def image_to_base64(self, data: bytes, mime_type: str = 'image/png') -> str:
+        """Encode image bytes as a data URI."""
+        return f"data:{mime_type};base64,{base64.b64encode(data).decode('utf-8')}"
+        
+    def package_image(self, data: bytes, mime_type: str) -> Dict[str, str]:
+        """Reference encoded image bytes: a ``src`` from the asset sink, or an inline ``data`` URI.
+        
+        Asset files are named after a hash of their bytes, so the same image
+        gets the same name whichever page, worker process or run wrote it;
+        the name is kept under ``asset``.
+        """
+        if self.asset_sink is not None:
+            name = f"image-{hashlib.sha256(data).hexdigest()[:16]}.{IMAGE_EXTENSIONS[mime_type]}"
+            return {'src': self.asset_sink.write(name, data, mime_type), 'asset': name}
+        return {'data': self.image_to_base64(data, mime_type)}
+        
+    def prepare_image(self, img: Image.Image, max_size: Optional[int] = None) -> Image.Image:
+        """Flatten transparency onto white, normalize the mode and shrink to ``max_size``.
+        
+        ``max_size`` defaults to ``max_dimension``.
+        """
+        if max_size is None:
+            max_size = self.max_dimension
+        try:
+            # Convert to RGB if needed
+            if img.mode in ['RGBA', 'LA']:
+                background = Image.new('RGB', img.size, (255, 255, 255))
+                if img.mode == 'RGBA':
+                    background.paste(img, mask=img.split()[3])
+                else:
+                    background.paste(img, mask=img.split()[1])
+                img = background
+            elif img.mode not in ['RGB', 'L']:
+                img = img.convert('RGB')
+            
+            # Check if resize needed
+            if max(img.size) > max_size:
+                # Calculate new size maintaining aspect ratio
+                ratio = max_size / max(img.size)
+                new_size = tuple(int(dim * ratio) for dim in img.size)
+                # Resize with high quality
+                img = img.resize(new_size, Image.Resampling.LANCZOS)
                 
+        except Exception as e:
+            print(f"Warning: Failed to optimize image: {str(e)}")
+            
+        return img
+        
+    def optimize_image(self, img_path: str, max_size: Optional[int] = None) -> None:
+        """Optimize an image file in place while maintaining quality; ``max_size`` defaults to ``max_dimension``."""
+        try:
+            with Image.open(img_path) as img:
+                img = self.prepare_image(img, max_size)
                 # Save with optimization
                 img.save(img_path, 'PNG', optimize=True)
                 
@@ -109,3 +484,48 @@ class ImageProcessor:
             os.rmdir(temp_dir)
         except Exception as e:
             print(f"Warning: Cleanup failed: {str(e)}")
+
+class ImageHandle:
+    """An image on a page that is rendered and encoded on first use.
+    
+    ``page`` and ``bbox`` locate the image and ``xref`` identifies its
+    stream (0 for inline images and merged fragments). ``result`` produces
+    the image reference, a ``data`` URI or an asset sink ``src``, once;
+    the page's document must still be open.
+    """
+    
+    def __init__(self, processor: ImageProcessor, page: fitz.Page, block_idx: int, block: Dict[str, Any]):
+        self.processor = processor
+        self.page = page
+        self.block_idx = block_idx
+        self.block = block
+        self._ref = None  # The reference, or {'pending': future} while encoding
+        self._error = None
+        
+    @property
+    def bbox(self) -> Tuple[float, float, float, float]:
+        return tuple(self.block['bbox'])
+        
+    @property
+    def xref(self) -> int:
+        if 'fragments' in self.block:
+            return 0
+        info = self.processor.page_image_info(self.page).get(self.block_idx)
+        return info.get('xref', 0) if info else 0
+        
+    def start(self) -> None:
+        """Render the image and start encoding it, unless already done."""
+        if self._ref is None and self._error is None:
+            try:
+                self._ref = self.processor.image_ref(self.page, self.block_idx, self.block)
+            except Exception as e:
+                self._error = e
+                
+    def result(self) -> Dict[str, str]:
+        """Get the image reference, producing it if needed; raises if that failed."""
+        self.start()
+        if self._error is not None:
+            raise self._error
+        if 'pending' in self._ref:
+            return self._ref['pending'].result()
+        return self._ref
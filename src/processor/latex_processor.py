@@ -8,96 +8,78 @@ class LatexProcessor:
         self.inline_equation_pattern = r'\$(.*?)\$'
         self.align_pattern = r'\\begin\{align\*?\}(.*?)\\end\{align\*?\}'
         
+        # Single scanner for all equation types; leftmost match wins, so
+        # equations never overlap. Inline equations do not span lines.
+        self.scanner = re.compile(
+            r'\\begin\{equation\}(?P<block>.*?)\\end\{equation\}'
+            r'|\\begin\{align\*?\}(?P<align>.*?)\\end\{align\*?\}'
+            r'|\$(?P<inline>[^\n]*?)\$',
+            re.DOTALL
+        )
+        self.whitespace_pattern = re.compile(r'\s+')
+        self.command_replacements = [
+            (re.compile(old), new) for old, new in [
+                (r'\\left', ''),
+                (r'\\right', ''),
+                (r'\\begin\{array\}', r'\\begin{aligned}'),
+                (r'\\end\{array\}', r'\\end{aligned}'),
+                (r'\\begin\{matrix\}', r'\\begin{aligned}'),
+                (r'\\end\{matrix\}', r'\\end{aligned}')
+            ]
+        ]
+        
     def detect_latex(self, text: str) -> bool:
         """Check if text contains LaTeX equations."""
-        patterns = [
-            self.block_equation_pattern,
-            self.inline_equation_pattern,
-            self.align_pattern
-        ]
-        return any(re.search(pattern, text, re.DOTALL) for pattern in patterns)
+        return self.scanner.search(text) is not None
     
     def extract_equations(self, text: str) -> List[Tuple[str, str, int, int]]:
-        """Extract LaTeX equations with their positions."""
-        equations = []
-        
-        # Find block equations
-        for match in re.finditer(self.block_equation_pattern, text, re.DOTALL):
-            equations.append((
-                match.group(1).strip(),
-                'block',
-                match.start(),
-                match.end()
-            ))
-            
-        # Find inline equations
-        for match in re.finditer(self.inline_equation_pattern, text):
-            equations.append((
-                match.group(1).strip(),
-                'inline',
-                match.start(),
-                match.end()
-            ))
-            
-        # Find align environments
-        for match in re.finditer(self.align_pattern, text, re.DOTALL):
-            equations.append((
-                match.group(1).strip(),
-                'align',
-                match.start(),
-                match.end()
-            ))
-            
-        return sorted(equations, key=lambda x: x[2])  # Sort by position
+        """Extract LaTeX equations with their positions, in document order."""
+        return [
+            (match.group(match.lastgroup).strip(), match.lastgroup, match.start(), match.end())
+            for match in self.scanner.finditer(text)
+        ]
     
     def clean_equation(self, equation: str) -> str:
         """Clean and normalize LaTeX equation."""
         # Remove unnecessary whitespace
-        equation = re.sub(r'\s+', ' ', equation.strip())
+        equation = self.whitespace_pattern.sub(' ', equation.strip())
         
         # Normalize common LaTeX commands
-        replacements = [
-            (r'\\left', ''),
-            (r'\\right', ''),
-            (r'\\begin\{array\}', r'\\begin{aligned}'),
-            (r'\\end\{array\}', r'\\end{aligned}'),
-            (r'\\begin\{matrix\}', r'\\begin{aligned}'),
-            (r'\\end\{matrix\}', r'\\end{aligned}')
-        ]
-        
-        for old, new in replacements:
-            equation = re.sub(old, new, equation)
+        for old, new in self.command_replacements:
+            equation = old.sub(new, equation)
             
         return equation
     
+    def equation_to_markdown(self, equation: str, eq_type: str) -> str:
+        """Format a cleaned equation of the given type as markdown math."""
+        if eq_type == 'block':
+            # Block equations use double dollar signs
+            return f"\n$$\n{equation}\n$$\n"
+        elif eq_type == 'align':
+            # Align environments also use double dollar signs
+            return f"\n$$\n\\begin{{aligned}}\n{equation}\n\\end{{aligned}}\n$$\n"
+        # Inline equations use single dollar signs
+        return f"${equation}$"
+    
+    def replacements(self, text: str) -> List[Tuple[int, int, str]]:
+        """Get the (start, end, markdown) replacement of every equation, in document order."""
+        return [
+            (match.start(), match.end(),
+             self.equation_to_markdown(self.clean_equation(match.group(match.lastgroup)), match.lastgroup))
+            for match in self.scanner.finditer(text)
+        ]
+    
     def convert_to_markdown(self, text: str) -> str:
-        """Convert LaTeX equations in text to markdown format."""
-        if not self.detect_latex(text):
-            return text
-            
-        equations = self.extract_equations(text)
-        result = text
-        offset = 0
+        """Convert LaTeX equations in text to markdown format in a single pass."""
+        parts = []
+        last_end = 0
         
-        for eq, eq_type, start, end in equations:
-            cleaned_eq = self.clean_equation(eq)
+        for start, end, markdown in self.replacements(text):
+            parts.append(text[last_end:start])
+            parts.append(markdown)
+            last_end = end
             
-            if eq_type == 'block':
-                # Block equations use double dollar signs
-                markdown_eq = f"\n$$\n{cleaned_eq}\n$$\n"
-            elif eq_type == 'align':
-                # Align environments also use double dollar signs
-                markdown_eq = f"\n$$\n\\begin{{aligned}}\n{cleaned_eq}\n\\end{{aligned}}\n$$\n"
-            else:
-                # Inline equations use single dollar signs
-                markdown_eq = f"${cleaned_eq}$"
-                
-            # Replace equation in text, accounting for previous replacements
-            result = (
-                result[:start + offset] +
-                markdown_eq +
-                result[end + offset:]
-            )
-            offset += len(markdown_eq) - (end - start)
-            
-        return result
+        if not parts:
+            return text
+        parts.append(text[last_end:])
+        return ''.join(parts)
@@ -25,7 +25,7 @@ class MarkdownAssembler:
         try:
             # Sort images by position
             sorted_images = sorted(
-                [img for img in images if isinstance(img, dict) and 'position' in img and 'data' in img],
+                [img for img in images if isinstance(img, dict) and 'position' in img and ('data' in img or 'src' in img)],
                 key=lambda x: x['position']
             )
             
@@ -38,7 +38,7 @@ class MarkdownAssembler:
                     try:
                         image_md = self.image_template.format(
                             alt=f"Image at position {img['position']}",
-                            src=img.get('data', '[Image processing failed]')
+                            src=img.get('src') or img.get('data', '[Image processing failed]')
                         )
                         text_parts.append(f"\n\n{image_md}\n\n")
                     except Exception as e:
@@ -0,0 +1,277 @@
+import fitz
+import numpy as np
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Tuple, Iterator, Optional, Callable
+from dataclasses import dataclass, field
+
+@dataclass
+class PageLayout:
+    """Parsed layout of a single PDF page, shared by all processors.
+
+    ``page.get_text("dict")`` is the most expensive PyMuPDF call in the
+    pipeline, so it is run once per page and the result handed to every
+    processor that needs text or image blocks.
+    """
+    width: float
+    height: float
+    text_blocks: List[Dict] = field(default_factory=list)
+    image_blocks: List[Tuple[int, Dict]] = field(default_factory=list)  # (block index, block)
+
+    @classmethod
+    def from_page(cls, page: fitz.Page) -> "PageLayout":
+        """Build the layout from a single ``get_text("dict")`` call."""
+        layout = cls(width=page.rect.width, height=page.rect.height)
+        for block_idx, block in enumerate(page.get_text("dict")["blocks"]):
+            if block["type"] == 0:  # Text block
+                layout.text_blocks.append(block)
+            elif block["type"] == 1:  # Image block
+                layout.image_blocks.append((block_idx, block))
+        return layout
+
+    def normalize_bbox(self, bbox: Tuple[float, float, float, float]) -> Dict[str, float]:
+        """Convert an absolute bbox to page-relative x, y, width and height."""
+        return {
+            'x': bbox[0] / self.width,
+            'y': bbox[1] / self.height,
+            'width': (bbox[2] - bbox[0]) / self.width,
+            'height': (bbox[3] - bbox[1]) / self.height
+        }
+
+class SpanRuns:
+    """Compact table of font runs over extracted text.
+    
+    Each run records the character offset where it starts, its font size
+    and whether it is bold; consecutive spans with the same font are merged
+    into one run. Runs are stored in flat arrays and must be appended in
+    offset order.
+    """
+    
+    def __init__(self):
+        self.offsets = array('q')
+        self.sizes = array('d')
+        self.bold = array('b')
+        
+    def __len__(self) -> int:
+        return len(self.offsets)
+        
+    def __iter__(self) -> Iterator[Tuple[int, float, bool]]:
+        for offset, size, bold in zip(self.offsets, self.sizes, self.bold):
+            yield offset, size, bool(bold)
+            
+    def append(self, offset: int, size: float, bold: bool) -> None:
+        """Add a run starting at ``offset``, merging it into the previous run if the font matches."""
+        if self.offsets and self.sizes[-1] == size and self.bold[-1] == bold:
+            return
+        self.offsets.append(offset)
+        self.sizes.append(size)
+        self.bold.append(bold)
+        
+    def extend(self, other: "SpanRuns", shift: int = 0) -> None:
+        """Append all runs of ``other`` with their offsets moved by ``shift``."""
+        for offset, size, bold in other:
+            self.append(offset + shift, size, bold)
+            
+    def remap(self, mapping: Callable[[int], int]) -> "SpanRuns":
+        """Get a copy with every run offset passed through ``mapping``, e.g. from ``remove_ranges``."""
+        runs = SpanRuns()
+        for offset, size, bold in self:
+            runs.append(mapping(offset), size, bold)
+        return runs
+        
+    def font_at(self, offset: int) -> Optional[Tuple[float, bool]]:
+        """Get the (size, bold) font in effect at a character offset."""
+        index = bisect_right(self.offsets, offset) - 1
+        if index < 0:
+            return None
+        return self.sizes[index], bool(self.bold[index])
+        
+    def line_fonts(self, text: str) -> List[Optional[Tuple[float, bool]]]:
+        """Get the font at the start of each line of ``text``."""
+        fonts = []
+        line_start = 0
+        for line in text.split('\n'):
+            fonts.append(self.font_at(line_start))
+            line_start += len(line) + 1
+        return fonts
+
+class FontStatistics:
+    """Document-level histogram of font sizes, weighted by character count.
+    
+    Font runs are added page by page during extraction. The most common size
+    is taken as the body font; sizes at least ``min_ratio`` times larger are
+    grouped into clusters of sizes less than ``cluster_gap`` points apart,
+    and the clusters rank as heading levels from the largest down. Bold
+    text at body size ranks below every larger size.
+    """
+    
+    BIN = 0.5  # Sizes are compared in half-point steps
+    MAX_SIZE_LEVELS = 5
+    
+    def __init__(self, min_ratio: float = 1.1, cluster_gap: float = 1.0):
+        self.min_ratio = min_ratio
+        self.cluster_gap = cluster_gap
+        self.histogram = np.zeros(0)  # Characters per size bin
+        self.bold_chars = 0
+        self._levels = None  # Size bin -> heading level, rebuilt after add
+        
+    def add(self, runs: SpanRuns, text_length: int) -> None:
+        """Count the characters of each run over text of ``text_length`` characters."""
+        if not len(runs):
+            return
+        offsets = np.frombuffer(runs.offsets, dtype=np.int64)
+        lengths = np.diff(offsets, append=max(text_length, int(offsets[-1])))
+        bins = np.rint(np.frombuffer(runs.sizes, dtype=np.float64) / self.BIN).astype(np.int64)
+        
+        counts = np.bincount(bins, weights=lengths)
+        if len(counts) > len(self.histogram):
+            counts[:len(self.histogram)] += self.histogram
+            self.histogram = counts
+        else:
+            self.histogram[:len(counts)] += counts
+        self.bold_chars += int(lengths[np.frombuffer(runs.bold, dtype=np.int8) != 0].sum())
+        self._levels = None
+        
+    @property
+    def body_size(self) -> Optional[float]:
+        """The most common font size, or None before any text was added."""
+        if not self.histogram.any():
+            return None
+        return float(np.argmax(self.histogram)) * self.BIN
+        
+    def _heading_levels(self) -> Dict[int, int]:
+        if self._levels is None:
+            self._levels = {}
+            body_size = self.body_size
+            if body_size is not None:
+                bins = np.flatnonzero(self.histogram)[::-1]  # Largest size first
+                bins = bins[bins * self.BIN >= body_size * self.min_ratio]
+                level, previous = 0, None
+                for size_bin in bins.tolist():
+                    if previous is None or (previous - size_bin) * self.BIN >= self.cluster_gap:
+                        level = min(level + 1, self.MAX_SIZE_LEVELS)
+                    self._levels[size_bin] = level
+                    previous = size_bin
+        return self._levels
+        
+    def heading_level(self, size: Optional[float], bold: bool = False) -> Optional[int]:
+        """Heading level for text in this font, or 0 for body text.
+        
+        Returns None when the fonts carry no heading information: no size is
+        known, or the document has neither larger sizes nor bold text.
+        """
+        levels = self._heading_levels()
+        if size is None or (not levels and not self.bold_chars):
+            return None
+        size_bin = int(round(size / self.BIN))
+        if levels and size_bin * self.BIN >= self.body_size * self.min_ratio:
+            # Sizes not seen in the document join the nearest cluster
+            return levels.get(size_bin) or levels[min(levels, key=lambda known: abs(known - size_bin))]
+        if bold and size_bin * self.BIN >= self.body_size:
+            return min((max(levels.values()) if levels else 0) + 1, 6)
+        return 0
+
+def replace_ranges(text: str, replacements: List[Tuple[int, int, str]]) -> Tuple[str, Callable[[int], int]]:
+    """Replace sorted, disjoint (start, end, new text) ranges of ``text``.
+    
+    Returns the new text and a function mapping old offsets to new ones;
+    offsets inside a replaced range map to the start of its replacement.
+    """
+    if not replacements:
+        return text, lambda offset: offset
+        
+    parts = []
+    starts = []
+    shift_before = []  # Change in length before each range
+    shift = 0
+    last_end = 0
+    for start, end, new_text in replacements:
+        parts.append(text[last_end:start])
+        parts.append(new_text)
+        starts.append(start)
+        shift_before.append(shift)
+        shift += len(new_text) - (end - start)
+        last_end = end
+    parts.append(text[last_end:])
+    
+    def mapping(offset: int) -> int:
+        index = bisect_right(starts, offset) - 1
+        if index < 0:
+            return offset
+        start, end, new_text = replacements[index]
+        if offset < end:
+            return start + shift_before[index]
+        return offset + shift_before[index] + len(new_text) - (end - start)
+        
+    return ''.join(parts), mapping
+
+def remove_ranges(text: str, ranges: List[Tuple[int, int]]) -> Tuple[str, Callable[[int], int]]:
+    """Cut sorted, disjoint (start, end) ranges out of ``text``.
+    
+    Returns the new text and a function mapping old offsets to new ones;
+    offsets inside a removed range map to where the range was.
+    """
+    return replace_ranges(text, [(start, end, '') for start, end in ranges])
+
+# How much further than the nearest block overall a block in the same column may be, in page heights
+COLUMN_SEARCH_DISTANCE = 0.25
+
+class BlockIndex:
+    """Structured blocks sorted by their top y coordinate for fast lookups.
+    
+    Blocks are dicts with page-relative ``x``, ``y`` and ``width`` keys, as
+    produced by ``PDFConverter.extract_page_content``. ``blocks`` holds them
+    in top-to-bottom order.
+    """
+    
+    def __init__(self, blocks: List[Dict]):
+        self._order = sorted(range(len(blocks)), key=lambda i: blocks[i]['y'])
+        self.blocks = [blocks[i] for i in self._order]
+        self._ys = [block['y'] for block in self.blocks]
+        
+    @staticmethod
+    def _overlaps(block: Dict, x0: float, x1: float) -> bool:
+        return block['x'] < x1 and block['x'] + block['width'] > x0
+        
+    def nearest(self, y: float, x0: Optional[float] = None, x1: Optional[float] = None) -> Optional[Dict]:
+        """Find the block whose top is closest to ``y``.
+        
+        When a horizontal extent ``x0``..``x1`` is given, blocks overlapping it
+        are preferred so that anchors stay in the same column, as long as
+        they are at most ``COLUMN_SEARCH_DISTANCE`` further away than the
+        nearest block overall; this bounds the walk when nothing is in the
+        column. Ties go to the block that came first in the original order.
+        """
+        nearest = self._nearest(y)
+        if nearest is None or x0 is None or x1 is None or self._overlaps(nearest, x0, x1):
+            return nearest
+        block = self._nearest(y, lambda block: self._overlaps(block, x0, x1),
+                              abs(nearest['y'] - y) + COLUMN_SEARCH_DISTANCE)
+        return block if block is not None else nearest
+        
+    def _nearest(self, y: float, accept: Optional[Callable[[Dict], bool]] = None,
+                 max_distance: float = float('inf')) -> Optional[Dict]:
+        # Walk outwards from the insertion point in order of increasing distance
+        right = bisect_left(self._ys, y)
+        left = right - 1
+        best = None  # (distance, original index, sorted index)
+        while left >= 0 or right < len(self._ys):
+            if right >= len(self._ys) or (left >= 0 and y - self._ys[left] <= self._ys[right] - y):
+                i, left = left, left - 1
+            else:
+                i, right = right, right + 1
+            distance = abs(self._ys[i] - y)
+            if distance > max_distance or (best is not None and distance > best[0]):
+                break
+            if accept is None or accept(self.blocks[i]):
+                candidate = (distance, self._order[i], i)
+                if best is None or candidate < best:
+                    best = candidate
+        return self.blocks[best[2]] if best else None
+        
+    def first_below(self, y: float, x0: float, x1: float) -> Optional[Dict]:
+        """Find the first block starting at or below ``y`` that overlaps ``x0``..``x1``, e.g. a caption."""
+        for block in self.blocks[bisect_left(self._ys, y):]:
+            if self._overlaps(block, x0, x1):
+                return block
+        return None
@@ -0,0 +1,91 @@
+import os
+import mmap
+import fitz  # PyMuPDF
+from typing import Union, BinaryIO, Optional, Dict, Any
+
+# A PDF given as a filesystem path, in-memory bytes or a binary file-like object
+PDFInput = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+
+class DocumentSource:
+    """Where a PDF is read from, and how to open it with fitz.
+
+    Paths are opened by fitz directly, or memory-mapped when the file is at
+    least ``mmap_threshold`` bytes so pages are served from the OS page
+    cache. Bytes and memoryviews are opened through fitz's stream interface
+    without copying; file-like objects are read once into memory. PyMuPDF
+    versions whose stream interface only takes bytes get a copy of
+    in-memory data instead, and large files are opened by path.
+    """
+
+    def __init__(self, source: PDFInput, mmap_threshold: Optional[int] = 64 * 1024 ** 2):
+        self.path: Optional[str] = None
+        self.data: Optional[Union[bytes, bytearray, memoryview]] = None
+        self.mmap_threshold = mmap_threshold
+        self._mapped = []  # (file, mmap, memoryview) of open memory-mapped documents
+        self._docs = []
+
+        if isinstance(source, DocumentSource):
+            self.path, self.data = source.path, source.data
+            self.mmap_threshold = source.mmap_threshold
+        elif isinstance(source, (str, os.PathLike)):
+            self.path = os.fspath(source)
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            self.data = source
+        elif hasattr(source, 'read'):
+            self.data = source.read()
+        else:
+            raise TypeError(f"Unsupported PDF source: {type(source).__name__}")
+
+    def open(self) -> fitz.Document:
+        """Open the document; release it with ``close``."""
+        if self.data is not None:
+            data = self.data if isinstance(self.data, (bytes, memoryview)) else memoryview(self.data)
+            try:
+                doc = fitz.open(stream=data, filetype="pdf")
+            except TypeError:
+                # Older PyMuPDF only takes bytes streams, which it copies anyway
+                doc = fitz.open(stream=bytes(data), filetype="pdf")
+        elif self.mmap_threshold is not None and os.path.getsize(self.path) >= self.mmap_threshold:
+            pdf_file = open(self.path, 'rb')
+            mapped = mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(mapped)
+            try:
+                doc = fitz.open(stream=view, filetype="pdf")
+                self._mapped.append((pdf_file, mapped, view))
+            except TypeError:
+                # Older PyMuPDF would copy the whole mapping; let it read the file instead
+                view.release()
+                mapped.close()
+                pdf_file.close()
+                doc = fitz.open(self.path)
+        else:
+            doc = fitz.open(self.path)
+        self._docs.append(doc)
+        return doc
+
+    def close(self) -> None:
+        """Close every document opened from this source and unmap its files."""
+        for doc in self._docs:
+            if not doc.is_closed:
+                doc.close()
+        self._docs = []
+        for pdf_file, mapped, view in self._mapped:
+            view.release()
+            mapped.close()
+            pdf_file.close()
+        self._mapped = []
+
+    def read_chunks(self, chunk_size: int = 1024 * 1024):
+        """Iterate over the raw PDF bytes, e.g. for hashing."""
+        if self.data is not None:
+            yield self.data
+            return
+        with open(self.path, 'rb') as pdf_file:
+            for chunk in iter(lambda: pdf_file.read(chunk_size), b''):
+                yield chunk
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Sent to worker processes: memoryviews are not picklable, open handles stay behind
+        data = bytes(self.data) if isinstance(self.data, memoryview) else self.data
+        return {'path': self.path, 'data': data, 'mmap_threshold': self.mmap_threshold,
+                '_mapped': [], '_docs': []}
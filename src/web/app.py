@@ -8,8 +8,6 @@ from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
-from tempfile import NamedTemporaryFile
-import shutil
 
 # Import our processors
 from ..processor.image_processor import ImageProcessor
@@ -72,15 +70,13 @@ async def convert_pdf(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="File must be a PDF")
         
     try:
-        # Save uploaded file temporarily
-        with NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_pdf:
-            shutil.copyfileobj(file.file, tmp_pdf)
-            tmp_path = tmp_pdf.name
-            
+        # Convert straight from the uploaded bytes, without a temporary file
+        pdf_data = await file.read()
+        
         try:
             # Convert PDF to markdown
             markdown, images, toc = convert_pdf_to_markdown(
-                tmp_path,
+                pdf_data,
                 image_processor=ImageProcessor(),
                 latex_processor=LatexProcessor(),
                 footnote_processor=FootnoteProcessor(),
@@ -91,16 +87,13 @@ async def convert_pdf(file: UploadFile = File(...)):
             print(f"Warning: {str(e)}")
             # Try conversion without image processing
             markdown, images, toc = convert_pdf_to_markdown(
-                tmp_path,
+                pdf_data,
                 image_processor=None,
                 latex_processor=LatexProcessor(),
                 footnote_processor=FootnoteProcessor(),
                 heading_processor=HeadingProcessor()
             )
         
-        # Clean up temp file
-        os.unlink(tmp_path)
-        
         return ConversionResponse(
             markdown=markdown,
             images=images,
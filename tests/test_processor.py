@@ -150,3 +150,657 @@ def test_heading_levels():
     assert processor.detect_heading_level("# Heading") == 1
     assert processor.detect_heading_level("1.2.3 Heading") == 3
     assert processor.detect_heading_level("ALL CAPS HEADING") == 2
+
+def test_page_layout(test_pdf_path):
+    """Test that a page layout splits text and image blocks from one parse."""
+    import fitz
+    from src.processor.page_layout import PageLayout
+
+    with fitz.open(test_pdf_path) as doc:
+        page = doc[0]
+        layout = PageLayout.from_page(page)
+
+        assert layout.width == page.rect.width
+        assert layout.height == page.rect.height
+        assert layout.text_blocks
+        assert all(block["type"] == 0 for block in layout.text_blocks)
+        assert all(block["type"] == 1 for _, block in layout.image_blocks)
+
+        # Image extraction reuses the parsed layout
+        images = ImageProcessor().extract_images(page, "", layout=layout)
+        assert len(images) == len(layout.image_blocks)
+
+def test_parallel_conversion_matches_serial(tmp_path):
+    """Test that page-parallel conversion produces the serial output."""
+    import fitz
+    from src.converter import PDFConverter
+    from src.processor.assets import DirectorySink
+
+    pdf_path = str(Path(__file__).parent / "sample_pdfs" / "Legal-Training-10pg.pdf")
+    serial = PDFConverter(image_processor=ImageProcessor()).convert(pdf_path)
+    parallel = PDFConverter(image_processor=ImageProcessor(), workers=3).convert(pdf_path)
+
+    assert parallel == serial
+
+    # A logo repeated across the pages of both workers, written as asset files
+    logo = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 80, 40), True)
+    logo.set_rect(logo.irect, (200, 30, 30, 128))
+    pdf_path = str(tmp_path / "letterhead.pdf")
+    with fitz.open() as doc:
+        for page_num in range(6):
+            page = doc.new_page()
+            page.insert_text((72, 300), f"Page {page_num + 1}", fontsize=10)
+            page.insert_image(fitz.Rect(72, 20, 232, 100), stream=logo.tobytes('png'))
+        doc.save(pdf_path)
+
+    serial_sink = DirectorySink(tmp_path / "serial" / "assets")
+    parallel_sink = DirectorySink(tmp_path / "parallel" / "assets")
+    serial = PDFConverter(image_processor=ImageProcessor(asset_sink=serial_sink)).convert(pdf_path)
+    parallel = PDFConverter(image_processor=ImageProcessor(asset_sink=parallel_sink), workers=2).convert(pdf_path)
+
+    assert parallel == serial
+    assert sorted(path.name for path in parallel_sink.directory.iterdir()) == \
+        sorted(path.name for path in serial_sink.directory.iterdir())
+
+def test_footnote_chunks():
+    """Test footnote state carried across streamed chunks."""
+    processor = FootnoteProcessor()
+    definitions, referenced = {}, set()
+
+    first = processor.convert_chunk("Text with a reference[1].", definitions, referenced)
+    second = processor.convert_chunk("More text[1].\n\n1. The footnote content", definitions, referenced)
+
+    assert first == "Text with a reference[1]."
+    assert "[^1]" in second
+    assert "The footnote content" not in second
+    assert processor.footnote_section(definitions) == "---\n\n[^1]: The footnote content"
+
+def test_streaming_conversion():
+    """Test page-by-page conversion."""
+    from src.converter import PDFConverter
+
+    pdf_path = str(Path(__file__).parent / "sample_pdfs" / "Legal-Training-10pg.pdf")
+    converter = PDFConverter()
+    chunks = converter.convert_iter(pdf_path)
+
+    first = next(chunks)
+    assert isinstance(first, str) and first.strip()
+
+    rest = list(chunks)
+    assert rest
+    assert converter.headings
+    assert converter.doc.is_closed
+
+def test_span_runs():
+    """Test span-run font lookups by offset and by line."""
+    from src.processor.page_layout import SpanRuns
+
+    runs = SpanRuns()
+    runs.append(0, 20.0, True)
+    runs.append(6, 11.0, False)
+    runs.append(12, 11.0, False)  # Same font, merged into the previous run
+
+    assert len(runs) == 2
+    assert runs.font_at(3) == (20.0, True)
+    assert runs.font_at(12) == (11.0, False)
+    assert runs.line_fonts("Title\nBody text\nMore") == [(20.0, True), (11.0, False), (11.0, False)]
+
+    headings = HeadingProcessor().extract_headings("Title\nbody text", runs)
+    assert [heading.text for heading in headings] == ["Title"]
+
+def test_page_block_positions(test_pdf_path):
+    """Test that block positions are offsets into the page text."""
+    import fitz
+    from src.converter import PDFConverter
+
+    with fitz.open(test_pdf_path) as doc:
+        text, _, font_info, blocks = PDFConverter().extract_page_content(doc[0], "")
+
+    for block in blocks:
+        assert text[block['position'] - len(block['text']):block['position']] == block['text']
+    assert all(text[offset:offset + 1].strip() for offset, _, _ in font_info)
+
+def test_block_index(monkeypatch):
+    """Test nearest-block and caption lookups in a two-column layout."""
+    from src.processor.page_layout import BlockIndex, COLUMN_SEARCH_DISTANCE
+
+    blocks = [
+        {'x': 0.1, 'y': 0.1, 'width': 0.35, 'position': 10},  # Left column
+        {'x': 0.55, 'y': 0.42, 'width': 0.35, 'position': 20},  # Right column
+        {'x': 0.1, 'y': 0.5, 'width': 0.35, 'position': 30},  # Left column
+        {'x': 0.55, 'y': 0.7, 'width': 0.35, 'position': 40},  # Right column, below
+    ]
+    index = BlockIndex(blocks)
+
+    assert index.nearest(0.4)['position'] == 20
+    assert index.nearest(0.4, 0.1, 0.4)['position'] == 30  # Same column wins
+    assert index.nearest(0.4, 0.95, 0.99)['position'] == 20  # No overlap, nearest overall
+    assert index.nearest(0.05, 0.6, 0.8)['position'] == 10  # Same column too far away
+
+    # With nothing in the image's column, only blocks near the nearest one are visited
+    right_column = BlockIndex([{'x': 0.55, 'y': i / 1000, 'width': 0.35, 'position': i} for i in range(1000)])
+    visited = []
+    overlaps = BlockIndex._overlaps
+    monkeypatch.setattr(BlockIndex, '_overlaps', staticmethod(lambda *args: visited.append(1) or overlaps(*args)))
+    assert right_column.nearest(0.5, 0.1, 0.4)['position'] == 500
+    assert len(visited) <= 2 * 1000 * COLUMN_SEARCH_DISTANCE + 3
+    assert index.first_below(0.45, 0.6, 0.8)['position'] == 40
+    assert index.first_below(0.9, 0.0, 1.0) is None
+
+def test_conversion_cache(test_pdf_path, tmp_path, monkeypatch):
+    """Test that cache hits skip opening the document."""
+    import fitz
+    from src.cache import ConversionCache
+
+    cache = ConversionCache(str(tmp_path))
+    result = convert_pdf_to_markdown(test_pdf_path, cache=cache)
+
+    def fail_open(*args, **kwargs):
+        raise AssertionError("Document opened on a cache hit")
+    monkeypatch.setattr(fitz, "open", fail_open)
+
+    assert convert_pdf_to_markdown(test_pdf_path, cache=cache) == result
+
+def test_conversion_cache_with_asset_sink(tmp_path, monkeypatch):
+    """Test that cache hits write asset files back after their directory was removed."""
+    import shutil
+    import fitz
+    from src.cache import ConversionCache, PageCache
+    from src.converter import PDFConverter
+    from src.processor.assets import AssetSink, DirectorySink
+
+    pdf_path = str(Path(__file__).parent / "sample_pdfs" / "18-page-test.pdf")
+    cache = ConversionCache(str(tmp_path / "cache"))
+    page_cache = PageCache(str(tmp_path / "pages"))
+    image_processor = ImageProcessor(asset_sink=DirectorySink(tmp_path / "assets"))
+    first = convert_pdf_to_markdown(pdf_path, image_processor=image_processor, cache=cache)
+    from_pages = PDFConverter(image_processor=image_processor, page_cache=page_cache).convert(pdf_path)
+    assert first[1] and from_pages[1] == first[1]
+
+    shutil.rmtree(tmp_path / "assets")
+    converter = PDFConverter(image_processor=image_processor, page_cache=page_cache)
+    extracted = []
+    converter.extract_page_content = lambda page, *args, **kwargs: extracted.append(page.number)
+    assert converter.convert(pdf_path) == from_pages and not extracted
+    assert all((tmp_path / img['src']).is_file() for img in from_pages[1])
+
+    shutil.rmtree(tmp_path / "assets")
+    with monkeypatch.context() as patch:
+        patch.setattr(fitz, "open", lambda *args, **kwargs: pytest.fail("Document opened on a cache hit"))
+        assert convert_pdf_to_markdown(pdf_path, image_processor=image_processor, cache=cache) == first
+    assert all((tmp_path / img['src']).is_file() for img in first[1])
+
+    # Sinks that cannot read their assets back are not cached
+    class UploadSink(AssetSink):
+        def write(self, name, data, mime_type):
+            return f"https://cdn.example/{name}"
+    uploads = ImageProcessor(asset_sink=UploadSink())
+    convert_pdf_to_markdown(pdf_path, image_processor=uploads, cache=cache)
+    assert len(list((tmp_path / "cache").glob("*.json"))) == 1
+
+def test_conversion_cache_eviction(tmp_path):
+    """Test least recently used eviction."""
+    import time
+    from src.cache import ConversionCache
+
+    cache = ConversionCache(str(tmp_path), max_size=300)
+    cache.put("old", "x" * 100, [], "")
+    time.sleep(0.01)
+    cache.put("new", "y" * 100, [], "")
+    time.sleep(0.01)
+    assert cache.get("old") is not None  # Now the most recently used
+    cache.put("newest", "z" * 100, [], "")
+
+    assert cache.get("new") is None
+    assert cache.get("old") is not None
+    assert cache.get("newest") is not None
+
+def test_page_cache_reextracts_changed_pages(tmp_path):
+    """Test that only edited pages are re-extracted with a page cache."""
+    import fitz
+    from src.cache import PageCache
+    from src.converter import PDFConverter
+
+    pdf_path = str(tmp_path / "doc.pdf")
+    with fitz.open() as doc:
+        for page_num in range(3):
+            doc.new_page().insert_text((72, 72), f"Page {page_num} text")
+        doc.save(pdf_path)
+
+    page_cache = PageCache(str(tmp_path / "pages"))
+    first = PDFConverter(page_cache=page_cache).convert(pdf_path)
+
+    with fitz.open(pdf_path) as doc:
+        doc[1].insert_text((72, 144), "Edited")
+        doc.save(pdf_path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+
+    converter = PDFConverter(page_cache=page_cache)
+    extracted = []
+    extract = converter.extract_page_content
+    converter.extract_page_content = lambda page, *args, **kwargs: extracted.append(page.number) or extract(page, *args, **kwargs)
+    second = converter.convert(pdf_path)
+
+    assert extracted == [1]
+    assert "Edited" in second[0] and "Edited" not in first[0]
+    assert "Page 2 text" in second[0]
+
+def test_convert_to_file():
+    """Test low-memory conversion streamed to a file handle."""
+    import io
+    from src.converter import PDFConverter
+
+    pdf_path = str(Path(__file__).parent / "sample_pdfs" / "Legal-Training-10pg.pdf")
+    output = io.StringIO()
+    toc = PDFConverter().convert_to_file(pdf_path, output)
+
+    chunks = list(PDFConverter().convert_iter(pdf_path))
+    assert "Table of Contents" in toc
+    assert output.getvalue() == toc + "\n\n\n---\n\n\n" + "\n\n".join(chunks)
+
+def test_instrumentation(test_pdf_path):
+    """Test per-stage and per-page instrumentation."""
+    import json
+    from src.instrumentation import Instrumentation, stage
+
+    instrumentation = Instrumentation()
+    markdown, _, _ = convert_pdf_to_markdown(test_pdf_path, instrumentation=instrumentation)
+
+    assert instrumentation.stages['get_text'].calls == 1
+    assert instrumentation.stages['assemble'].bytes == len(markdown)
+    assert 'get_text' in instrumentation.pages[0]
+    assert set(json.loads(instrumentation.to_json())['stages']) >= {'latex', 'headings', 'footnotes'}
+
+    # Without a hook every stage shares one no-op timer
+    assert stage(None, 'render') is stage(None, 'optimize_image')
+
+def test_benchmark_corpus_is_deterministic(tmp_path):
+    """Test that synthetic benchmark documents are reproducible."""
+    import fitz
+    from benchmarks.corpus import KINDS, generate
+
+    for kind in KINDS:
+        first = generate(kind, 2, str(tmp_path / f"{kind}-a.pdf"))
+        second = generate(kind, 2, str(tmp_path / f"{kind}-b.pdf"))
+        with fitz.open(first) as a, fitz.open(second) as b:
+            assert len(a) == 2
+            assert [page.get_text() for page in a] == [page.get_text() for page in b]
+
+def test_in_memory_sources(test_pdf_path):
+    """Test conversion from bytes, file-like objects and memory-mapped files."""
+    import io
+    from src.converter import PDFConverter
+    from src.source import DocumentSource
+
+    expected = PDFConverter().convert(test_pdf_path)
+    data = Path(test_pdf_path).read_bytes()
+
+    assert PDFConverter().convert(data) == expected
+    assert PDFConverter().convert(memoryview(data)) == expected
+    assert PDFConverter().convert(bytearray(data)) == expected
+    assert PDFConverter().convert(io.BytesIO(data)) == expected
+
+    source = DocumentSource(test_pdf_path, mmap_threshold=0)
+    assert PDFConverter().convert(source) == expected
+    assert not source._mapped
+
+    with pytest.raises(TypeError):
+        DocumentSource(42)
+
+def test_latex_single_pass_scanner():
+    """Test that mixed equation types are found in order and converted in one pass."""
+    processor = LatexProcessor()
+    text = "a $x$ b \\begin{align} y &= 1 \\end{align} c \\begin{equation} \\left( z \\right) \\end{equation} d $w"
+
+    equations = processor.extract_equations(text)
+    assert [eq_type for _, eq_type, _, _ in equations] == ['inline', 'align', 'block']
+    assert all(a[3] <= b[2] for a, b in zip(equations, equations[1:]))
+
+    markdown = processor.convert_to_markdown(text)
+    assert markdown.startswith("a $x$ b \n$$\n\\begin{aligned}\ny &= 1\n\\end{aligned}\n$$\n c ")
+    assert "\n$$\n( z )\n$$\n d $w" in markdown
+    assert processor.convert_to_markdown("no math here") == "no math here"
+
+def test_footnote_single_pass():
+    """Test that every reference is rewritten and each footnote is emitted once."""
+    processor = FootnoteProcessor()
+    text = "Text[1] and more[2] and again[1].\n\nSteps:\n1. Not a note\nbody\n\n1. First note\n2. Second note"
+
+    converted = processor.convert_to_markdown(text)
+    assert converted.startswith("Text[^1] and more[^2] and again[^1].")
+    assert "1. Not a note" in converted
+    assert converted.endswith("---\n\n[^1]: First note\n[^2]: Second note")
+
+    references, definitions = processor.scan(text)
+    assert [ref_id for ref_id, _, _ in references] == ['1', '2', '1']
+    assert [(def_id, content) for def_id, content, _, _ in definitions] == [('1', 'First note'), ('2', 'Second note')]
+
+def test_footnote_accumulator_across_pages():
+    """Test footnote blocks found by position and references carried to later pages."""
+    from src.processor.footnote_processor import FootnoteAccumulator
+    from src.processor.page_layout import remove_ranges
+
+    def page(*blocks):
+        texts = [text for text, _ in blocks]
+        positions = [sum(len(t) + 1 for t in texts[:i]) + len(texts[i]) for i in range(len(texts))]
+        return '\n'.join(texts), [{'text': text, 'y': y, 'position': end} for (text, y), end in zip(blocks, positions)]
+
+    accumulator = FootnoteAccumulator()
+    assert accumulator.parse_definitions("1. First note 2. Second in 1999. note") == [('1', 'First note'), ('2', 'Second in 1999. note')]
+
+    # Page 1 references a footnote that is only defined on page 2
+    text, blocks = page(("Intro[1] and more[2].", 0.1), ("2. A numbered list item", 0.5), ("1. Note one", 0.9))
+    ranges = accumulator.take_definitions(text, blocks)
+    text, mapping = remove_ranges(text, ranges)
+    assert text == "Intro[1] and more[2].\n2. A numbered list item"
+    assert mapping(len("Intro[1] and more[2].")) == len("Intro[1] and more[2].")
+    assert accumulator.add_page(text, 0) == []
+
+    text, blocks = page(("2. Note two, continued", 0.8), ("Body text", 0.85))
+    text, _ = remove_ranges(text, accumulator.take_definitions(text, blocks))
+    released = accumulator.add_page(text, 1)
+    assert released == [("Intro[^1] and more[^2].\n2. A numbered list item", 0), ("Body text", 1)]
+    assert accumulator.finish() == []
+    assert accumulator.footnote_section() == "---\n\n[^1]: Note one\n[^2]: Note two, continued"
+
+def test_heading_analysis_single_pass():
+    """Test that one analysis call returns the markdown, headings and TOC."""
+    processor = HeadingProcessor()
+    text = "1. Introduction\nSome text\n1.1 Background\nMore text"
+
+    markdown, headings, toc = processor.analyze(text)
+    assert markdown == processor.convert_to_markdown(text)
+    assert [(h.text, h.level) for h in headings] == [("1. Introduction", 1), ("1.1 Background", 2)]
+    assert toc == processor.get_table_of_contents(processor.extract_headings(text))
+    assert "- [Introduction](#introduction)" in toc
+
+def test_font_statistics_heading_levels():
+    """Test heading levels from font size clusters relative to the body font."""
+    from src.processor.page_layout import SpanRuns, FontStatistics
+
+    text = "Title\n1 Section\nBody text that runs on for a while\n1.1 Subsection\n1. A numbered body line\nBold lead"
+    runs = SpanRuns()
+    offset = 0
+    for line, size, bold in zip(text.split('\n'), [24, 14, 10, 14, 10, 10], [False, True, False, True, False, True]):
+        runs.append(offset, size, bold)
+        offset += len(line) + 1
+
+    stats = FontStatistics()
+    stats.add(runs, len(text))
+    assert stats.body_size == 10
+    assert stats.heading_level(24) == 1
+    assert stats.heading_level(13.5) == 2  # Clustered with 14
+    assert stats.heading_level(10, bold=True) == 3
+    assert stats.heading_level(10) == 0
+    assert FontStatistics().heading_level(12) is None
+
+    processor = HeadingProcessor()
+    headings = processor.extract_headings(text, runs, normalize=False)
+    assert [(h.text, h.level) for h in headings] == [
+        ("Title", 1), ("1 Section", 2), ("1.1 Subsection", 3), ("Bold lead", 3)
+    ]
+
+def test_image_asset_sink(tmp_path):
+    """Test that images are written once as files and referenced by relative path."""
+    from src.converter import PDFConverter
+    from src.processor.assets import DirectorySink
+
+    pdf_path = str(Path(__file__).parent / "sample_pdfs" / "18-page-test.pdf")
+    sink = DirectorySink(tmp_path / "paper_assets")
+    markdown, images, _, _ = PDFConverter(image_processor=ImageProcessor(asset_sink=sink)).convert(pdf_path)
+
+    assert images and "data:image" not in markdown
+    for img in images:
+        assert 'data' not in img
+        assert img['src'].startswith("paper_assets/")
+        assert f"]({img['src']})" in markdown
+        assert (tmp_path / img['src']).stat().st_size > 0
+
+def test_embedded_images_pass_through(tmp_path):
+    """Test that plain embedded JPEGs are used as is and rotated ones are rendered."""
+    import base64
+    import io
+    import fitz
+    from PIL import Image
+    from src.instrumentation import Instrumentation
+
+    jpeg = io.BytesIO()
+    Image.new('RGB', (64, 48), (200, 40, 40)).save(jpeg, 'JPEG')
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_image(fitz.Rect(72, 72, 200, 168), stream=jpeg.getvalue())
+    page.insert_image(fitz.Rect(72, 300, 200, 396), stream=jpeg.getvalue(), rotate=90)
+
+    instrumentation = Instrumentation()
+    processor = ImageProcessor(instrumentation=instrumentation)
+    images = processor.extract_images(page, str(tmp_path), wait=True)
+
+    assert len(images) == 2
+    assert images[0]['data'] == "data:image/jpeg;base64," + base64.b64encode(jpeg.getvalue()).decode('utf-8')
+    assert images[1]['data'].startswith("data:image/png;base64,")
+    assert instrumentation.stages['render'].calls == 1
+
+def test_in_memory_image_pipeline(test_pdf_path):
+    """Test that pixmaps are wrapped for PIL without a PNG round trip."""
+    import io
+    import fitz
+    from PIL import Image
+
+    processor = ImageProcessor()
+    with fitz.open(test_pdf_path) as doc:
+        pix = doc[0].get_pixmap(clip=fitz.Rect(0, 0, 100, 50))
+        img = processor.pixmap_to_image(pix)
+        assert img.size == (pix.width, pix.height)
+        assert img.tobytes() == Image.open(io.BytesIO(pix.tobytes('png'))).convert(img.mode).tobytes()
+
+    data = processor.encode_image(img)
+    assert Image.open(io.BytesIO(data)).size == img.size
+    assert processor.image_to_base64(data).startswith("data:image/png;base64,")
+
+def test_render_at_target_resolution(test_pdf_path):
+    """Test that image regions are rendered at max_dimension rather than at full DPI."""
+    import base64
+    import io
+    import fitz
+    from PIL import Image
+
+    processor = ImageProcessor(max_dimension=200)
+    with fitz.open(test_pdf_path) as doc:
+        page = doc[0]
+        rendered = []
+        original = page.get_pixmap
+        page.get_pixmap = lambda *args, **kwargs: rendered.append(original(*args, **kwargs)) or rendered[-1]
+        ref = processor.render_image(page, {'bbox': tuple(page.rect)})
+
+    assert 199 <= max(rendered[0].width, rendered[0].height) <= 201
+    data = ref['data'].split(',', 1)[1]
+    assert max(Image.open(io.BytesIO(base64.b64decode(data))).size) <= 200
+
+def test_repeated_images_processed_once(tmp_path):
+    """Test that an image repeated on every page is rendered and written once per document."""
+    import fitz
+    from src.converter import PDFConverter
+    from src.processor.assets import DirectorySink
+    from src.instrumentation import Instrumentation
+
+    logo = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 80, 40), True)
+    logo.set_rect(logo.irect, (200, 30, 30, 128))  # Soft mask, so it is rendered
+    pdf_path = str(tmp_path / "letterhead.pdf")
+    with fitz.open() as doc:
+        for page_num in range(4):
+            page = doc.new_page()
+            page.insert_text((72, 300), f"Page {page_num + 1}", fontsize=10)
+            page.insert_image(fitz.Rect(72, 20, 232, 100), stream=logo.tobytes('png'))
+        doc.save(pdf_path)
+
+    instrumentation = Instrumentation()
+    image_processor = ImageProcessor(asset_sink=DirectorySink(tmp_path / "letterhead_assets"))
+    converter = PDFConverter(image_processor=image_processor, instrumentation=instrumentation)
+    _, images, _, _ = converter.convert(pdf_path)
+
+    assert len(images) == 4
+    assert len({img['src'] for img in images}) == 1
+    assert [path.name for path in (tmp_path / "letterhead_assets").iterdir()] == [images[0]['src'].split('/')[-1]]
+    assert instrumentation.stages['render'].calls == 1
+    assert instrumentation.stages['wait_images'].calls == 4
+
+def test_inline_image_reuse_is_bounded(tmp_path):
+    """Test that only recently used data URIs are kept for reuse, while asset paths all are."""
+    import fitz
+    from src.processor.assets import DirectorySink
+    from src.processor.image_processor import MAX_INLINE_IMAGES
+
+    with fitz.open() as doc:
+        for page_num in range(MAX_INLINE_IMAGES + 4):
+            page = doc.new_page()
+            pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 40, 40), False)
+            pix.set_rect(pix.irect, (page_num * 8, 100, 100))
+            page.insert_image(fitz.Rect(72, 72, 152, 152), pixmap=pix)
+
+        inline = ImageProcessor()
+        assets = ImageProcessor(asset_sink=DirectorySink(tmp_path / "assets"))
+        for page in doc:
+            assert len(inline.extract_images(page, wait=True)) == 1
+            assert len(assets.extract_images(page, wait=True)) == 1
+
+        assert len(inline.document_images(doc)) == MAX_INLINE_IMAGES
+        assert inline.document_images(doc[0].parent) is inline.document_images(doc[1].parent)
+        assert len(assets.document_images(doc)) > MAX_INLINE_IMAGES
+
+def test_threaded_image_encoding():
+    """Test that encoding images in threads gives the same output as encoding inline."""
+    import io
+    import threading
+    from src.converter import PDFConverter
+
+    pdf_path = str(Path(__file__).parent / "sample_pdfs" / "18-page-test.pdf")
+    inline = PDFConverter(image_processor=ImageProcessor()).convert(pdf_path)
+    threaded = PDFConverter(image_processor=ImageProcessor(encode_threads=2)).convert(pdf_path)
+    assert threaded[0] == inline[0]
+    assert threaded[1] == inline[1] and all('pending' not in img for img in threaded[1])
+    assert not any(thread.name.startswith('image-encode') for thread in threading.enumerate())
+
+    output = io.StringIO()
+    PDFConverter(image_processor=ImageProcessor(encode_threads=2)).convert_to_file(pdf_path, output)
+    streamed = io.StringIO()
+    PDFConverter(image_processor=ImageProcessor()).convert_to_file(pdf_path, streamed)
+    assert output.getvalue() == streamed.getvalue()
+
+def test_image_codec_selection():
+    """Test that photos are stored lossy with the configured quality and line art as PNG."""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    photo = Image.fromarray(rng.integers(0, 256, (300, 400, 3), dtype=np.uint8))
+    chart = Image.new('RGB', (400, 300), (255, 255, 255))
+    chart.paste((30, 90, 200), (50, 50, 350, 120))
+    icon = photo.resize((32, 32))
+
+    processor = ImageProcessor(image_quality=40)
+    assert [processor.classify_image(img)[0] for img in (photo, chart, icon)] == ['photo', 'diagram', 'icon']
+    assert processor.optimized_image_ref(photo, 0)['data'].startswith("data:image/jpeg;base64,")
+    assert processor.optimized_image_ref(chart, 0)['data'].startswith("data:image/png;base64,")
+    assert processor.optimized_image_ref(icon, 0)['data'].startswith("data:image/png;base64,")
+
+    low = processor.optimized_image_ref(photo, 0)['data']
+    processor.quality_settings['photo']['quality'] = 90
+    assert len(processor.optimized_image_ref(photo, 0)['data']) > len(low)
+    processor = ImageProcessor(image_quality=40, photo_format='webp')
+    assert processor.optimized_image_ref(photo, 0)['data'].startswith("data:image/webp;base64,")
+    with pytest.raises(ValueError):
+        ImageProcessor(photo_format='gif')
+    with pytest.raises(ValueError):
+        ImageProcessor(image_quality=0)
+
+def test_decorative_image_fragments():
+    """Test that bullets, rules and spacers are dropped and picture slices rendered as one image."""
+    import fitz
+    from src.instrumentation import Instrumentation
+
+    bullet = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 8, 8), True)
+    bullet.set_rect(bullet.irect, (200, 30, 30, 160))
+    spacer = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 1, 1), False)
+    picture = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 64, 48), False)
+    picture.set_rect(picture.irect, (20, 90, 200))
+    doc = fitz.open()
+    page = doc.new_page()
+    for row in range(5):
+        page.insert_image(fitz.Rect(72, 72 + row * 14, 78, 78 + row * 14), pixmap=bullet)
+        page.insert_image(fitz.Rect(72, 82 + row * 14, 540, 83 + row * 14), pixmap=spacer)
+    page.insert_image(fitz.Rect(300, 200, 460, 320), pixmap=picture)
+    for row in range(20):
+        strip = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 100, 2), False)
+        strip.set_rect(strip.irect, (row * 12, 120, 255 - row * 12))
+        page.insert_image(fitz.Rect(72, 400 + row * 4, 272, 404 + row * 4), pixmap=strip)
+
+    instrumentation = Instrumentation()
+    images = ImageProcessor(instrumentation=instrumentation).extract_images(page, wait=True)
+
+    assert len(images) == 2
+    picture_image, sliced_image = sorted(images, key=lambda img: img['y'])
+    assert picture_image['data'].startswith("data:image/png;base64,")
+    assert abs(sliced_image['y'] * page.rect.height - 400) < 1
+    assert abs(sliced_image['height'] * page.rect.height - 80) < 1
+    assert instrumentation.stages['render'].calls == 1
+
+def test_lazy_image_handles():
+    """Test that images are only rendered and encoded once they are asked for."""
+    import fitz
+    from src.converter import PDFConverter
+    from src.instrumentation import Instrumentation
+    from src.processor.image_processor import ImageHandle
+
+    pdf_path = str(Path(__file__).parent / "sample_pdfs" / "18-page-test.pdf")
+    instrumentation = Instrumentation()
+    converter = PDFConverter(image_processor=ImageProcessor(), instrumentation=instrumentation)
+    with fitz.open(pdf_path) as doc:
+        pages = [converter.extract_page_content(page) for page in doc]
+        images = [img for _, page_images, _, _ in pages for img in page_images]
+        assert images and all(isinstance(img['pending'], ImageHandle) for img in images)
+        assert 'optimize_image' not in instrumentation.stages and 'render' not in instrumentation.stages
+
+        handle = images[0]['pending']
+        assert handle.page.parent.name == doc.name and handle.xref > 0 and len(handle.bbox) == 4
+        converter.image_processor.wait_images(images)
+
+    # Text-only conversion through the main API never renders an image
+    instrumentation = Instrumentation()
+    text_only = PDFConverter(image_processor=ImageProcessor(), instrumentation=instrumentation, workers=2)
+    expected = PDFConverter().convert(pdf_path)
+    assert text_only.convert(pdf_path, images=False) == expected
+    assert list(text_only.convert_iter(pdf_path, images=False)) == list(PDFConverter().convert_iter(pdf_path))
+    assert 'optimize_image' not in instrumentation.stages and 'render' not in instrumentation.stages
+
+    instrumentation = Instrumentation()
+    converted = PDFConverter(image_processor=ImageProcessor(), instrumentation=instrumentation).convert(pdf_path)[1]
+    assert [img['data'] for img in images] == [img['data'] for img in converted]
+    assert instrumentation.stages['wait_images'].bytes == sum(len(img['data']) for img in converted)
+    assert instrumentation.stages['extract_images'].bytes == 0
+
+def test_headings_after_latex_equations(tmp_path):
+    """Test that font lookups for headings follow the text rewritten by the LaTeX stage."""
+    import io
+    import fitz
+    from src.converter import PDFConverter
+
+    pdf_path = str(tmp_path / "equations.pdf")
+    with fitz.open() as doc:
+        page = doc.new_page()
+        y = 72
+        for index in range(4):
+            page.insert_text((72, y), f"\\begin{{equation}} x_{index} = \\frac{{a}}{{b}} + c \\end{{equation}}", fontsize=11)
+            y += 40
+        page.insert_text((72, y), "Results Overview", fontsize=20)
+        y += 40
+        for index in range(6):
+            page.insert_text((72, y), f"body text line number {index} with some words", fontsize=11)
+            y += 40
+        doc.save(pdf_path)
+
+    _, _, toc, _ = PDFConverter().convert(pdf_path)
+    assert "Results Overview" in toc
+    assert "body text line" not in toc
+
+    converter = PDFConverter()
+    converter.convert_to_file(pdf_path, io.StringIO())
+    assert [heading.text for heading in converter.headings] == ["Results Overview"]